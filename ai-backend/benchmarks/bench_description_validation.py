@@ -0,0 +1,84 @@
+# benchmarks/bench_description_validation.py
+#
+# Throughput of is_valid_description before and after the lightweight pipeline:
+#   legacy  : full en_core_web_sm pipeline, spell.candidates() for every token
+#   current : tagger-only pipeline, dictionary check first, memoized tokens,
+#             early exit once two dictionary words are found
+# Both run over the same corpus and must return identical verdicts.
+#
+# Run from ai-backend/:  python -m benchmarks.bench_description_validation [--rounds N] [--save NAME] [--compare NAME]
+import os, re, time, argparse
+import spacy
+
+from benchmarks.harness import Results, summarize, add_baseline_args, report
+from validators.pain_data_validation import is_valid_description, is_dictionary_word, get_spell
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "descriptions.txt")
+
+def load_corpus(path: str = CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
+
+full_nlp = spacy.load("en_core_web_sm")
+spell = get_spell()
+
+def legacy_is_valid_description(text: str) -> bool:
+    text = text.strip()
+    if len(text) < 3:
+        return False
+    normalized = re.sub(r"[^a-zA-Z\s]", " ", text.lower())
+    tokens = [t for t in normalized.split() if t]
+    if len(tokens) < 1:
+        return False
+    correct_words = 0
+    for token in tokens:
+        candidates = spell.candidates(token)
+        if token in spell or (candidates is not None and len(candidates) > 0):
+            correct_words += 1
+    if correct_words < 2:
+        return False
+    doc = full_nlp(text)
+    has_verb_or_noun = any(tok.pos_ in ("VERB", "NOUN", "PROPN") for tok in doc)
+    return correct_words >= 2 and has_verb_or_noun
+
+def run(fn, corpus, rounds: int):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        verdicts = []
+        for text in corpus:
+            call_start = time.perf_counter()
+            verdicts.append(fn(text))
+            latencies.append((time.perf_counter() - call_start) * 1000)
+    return verdicts, summarize(latencies, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="is_valid_description throughput, legacy vs current")
+    parser.add_argument("--rounds", type=int, default=5)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    legacy, legacy_stats = run(legacy_is_valid_description, corpus, args.rounds)
+
+    is_dictionary_word.cache_clear()
+    cold, cold_stats = run(is_valid_description, corpus, 1)
+    warm, warm_stats = run(is_valid_description, corpus, args.rounds)
+    legacy_rate, cold_rate, warm_rate = legacy_stats["ops_s"], cold_stats["ops_s"], warm_stats["ops_s"]
+
+    mismatches = [text for text, a, b in zip(corpus, legacy, warm) if a != b]
+    print(f"corpus: {len(corpus)} descriptions ({sum(legacy)} valid), rounds: {args.rounds}")
+    print(f"legacy            : {legacy_rate:10.1f} desc/s")
+    print(f"current (cold)    : {cold_rate:10.1f} desc/s  ({cold_rate / legacy_rate:.1f}x)")
+    print(f"current (warm)    : {warm_rate:10.1f} desc/s  ({warm_rate / legacy_rate:.1f}x)")
+    print(f"token cache       : {is_dictionary_word.cache_info()}")
+    if mismatches or cold != warm:
+        print(f"VERDICT MISMATCHES: {mismatches}")
+        raise SystemExit(1)
+    print("verdicts identical\n")
+
+    results: Results = {"legacy": legacy_stats, "current/cold": cold_stats, "current/warm": warm_stats}
+    report("description_validation", results, args, {"corpus": len(corpus), "rounds": args.rounds})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_duplicates.py
+#
+# Duplicate-check latency (run_duplicate_check, the code behind
+# /ai/checkDuplicates/) against synthetic user histories of 10 to 5000
+# records, served by the in-memory Mongo stand-in. Per history size:
+#   exact/warm : description identical to a stored one (step 1 decides)
+#   near/warm  : a stored description with its words reordered (fuzzy decides)
+#   novel/warm : an unseen description; the cascade reaches the transformer
+#   novel/cold : same, with the user's history index and routine states
+#                dropped before every check, so it includes the history
+#                fetch, index build, routine state load and embedding of
+#                every record the cascade reaches
+# The embedding store is disabled so cold checks always encode. Uses the
+# configured embedding backend (EMBEDDING_BACKEND or --backend); the model's
+# load time is excluded.
+#
+# Run from ai-backend/:  python -m benchmarks.bench_duplicates [--sizes 10,100,1000,5000] [--save NAME] [--compare NAME]
+import os, random, asyncio, argparse
+
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("PAINDATA_COLL", "painData")
+os.environ.setdefault("EXERCISES_COLL", "exercises")
+os.environ["EMBEDDING_STORE_DIR"] = ""
+
+from fastapi import HTTPException
+from benchmarks.harness import Results, measure_async, add_baseline_args, report
+from benchmarks.in_memory_mongo import InMemoryMongoClient, InMemoryCollection
+from benchmarks.synthetic import synthetic_history
+from models.pain_data import PainData, PAIN_TYPES_KEY
+from utils.metadata_provider import metadata_provider, InMemoryMetadataBackend
+from utils.registry import registry
+
+NOVEL_DESCRIPTIONS = [
+    "numbness in my {place} when kneeling on hard floors",
+    "my {place} locks up after long drives and feels unstable",
+    "grinding noise from the {place} whenever I squat down",
+    "pins and needles around the {place} late at night",
+    "the {place} gives way on uneven ground during hikes",
+]
+
+def build_database(sizes, ongoing_ratio: float, seed: int) -> InMemoryMongoClient:
+    client = InMemoryMongoClient()
+    database = client[os.environ["DB_NAME"]]
+    pain_data = database[os.environ["PAINDATA_COLL"]] = InMemoryCollection(indexes=["userEmail"])
+    exercises = database[os.environ["EXERCISES_COLL"]] = InMemoryCollection(indexes=["painDataId"])
+    rng = random.Random(seed)
+    for size in sizes:
+        history = synthetic_history(f"user{size}@bench.local", "knee", size, seed=seed + size)
+        pain_data.insert_many_now(history)
+        exercises.insert_many_now(
+            {"painDataId": record["_id"], "progressPercent": 50, "updatedAt": record["createdAt"]}
+            for record in history if rng.random() < ongoing_ratio
+        )
+    return client
+
+def pain_data(user_email: str, description: str) -> PainData:
+    return PainData(
+        userId="bench", userEmail=user_email, injuryPlace="knee",
+        painType="sharp", painLevel=5, description=description
+    )
+
+async def check(duplicates, data: PainData) -> bool:
+    """True when the check rejected the entry (409)."""
+    try:
+        await duplicates.run_duplicate_check(data)
+        return False
+    except HTTPException:
+        return True
+
+async def bench_size(duplicates, client, size: int, rng: random.Random, rounds: int, cold_rounds: int) -> Results:
+    user = f"user{size}@bench.local"
+    history = [d for d in client[os.environ["DB_NAME"]][os.environ["PAINDATA_COLL"]].documents if d["userEmail"] == user]
+
+    def shuffled(text):
+        words = text.split()
+        rng.shuffle(words)
+        return " ".join(words)
+
+    cases = {
+        "exact": lambda: pain_data(user, rng.choice(history)["description"]),
+        "near": lambda: pain_data(user, shuffled(rng.choice(history)["description"])),
+        "novel": lambda: pain_data(user, rng.choice(NOVEL_DESCRIPTIONS).format(place="knee")),
+    }
+    results: Results = {}
+    duplicates.pain_history_index.invalidate(user)
+    duplicates.routine_states.invalidate(user)
+    for name, make in cases.items():
+        rejected = []
+        async def run():
+            rejected.append(await check(duplicates, make()))
+        results[f"{size}/{name}/warm"] = await measure_async(run, rounds)
+        results[f"{size}/{name}/warm"]["rejected_ratio"] = sum(rejected) / len(rejected)
+
+    async def run_cold():
+        duplicates.pain_history_index.invalidate(user)
+        duplicates.routine_states.invalidate(user)
+        await check(duplicates, cases["novel"]())
+    results[f"{size}/novel/cold"] = await measure_async(run_cold, cold_rounds, warmup=0)
+    return results
+
+async def run_benchmarks(args):
+    # imported here so --backend can set EMBEDDING_BACKEND first
+    from validators import pain_data_duplicates as duplicates
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    client = build_database(sizes, args.ongoing_ratio, args.seed)
+    registry.register("mongo_async", lambda: client, fork_safe=False)
+    metadata_provider.set_backend(InMemoryMetadataBackend({PAIN_TYPES_KEY: ["sharp"]}))
+    duplicates.get_embedding_model()
+
+    rng = random.Random(args.seed)
+    results: Results = {}
+    for size in sizes:
+        results.update(await bench_size(duplicates, client, size, rng, args.rounds, args.cold_rounds))
+    duplicates.duplicates_pool.shutdown()
+
+    params = {
+        "sizes": sizes, "rounds": args.rounds, "cold_rounds": args.cold_rounds,
+        "backend": duplicates.EMBEDDING_BACKEND, "ongoing_ratio": args.ongoing_ratio, "seed": args.seed
+    }
+    report("duplicates", results, args, params)
+    print(f"\ncascade: {duplicates.cascade_stats()}")
+    print(f"routine states: {duplicates.routine_states.info()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate check latency against synthetic histories")
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--rounds", type=int, default=50, help="timed checks per warm case")
+    parser.add_argument("--cold-rounds", type=int, default=3, help="timed checks per cold case")
+    parser.add_argument("--backend", help="embedding backend (default: EMBEDDING_BACKEND or mpnet)")
+    parser.add_argument("--ongoing-ratio", type=float, default=0.2, help="share of records with an unfinished exercise routine")
+    parser.add_argument("--seed", type=int, default=3)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+    if args.backend:
+        os.environ["EMBEDDING_BACKEND"] = args.backend
+    asyncio.run(run_benchmarks(args))
+
+if __name__ == "__main__":
+    main()
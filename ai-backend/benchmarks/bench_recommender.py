@@ -0,0 +1,94 @@
+# benchmarks/bench_recommender.py
+#
+# Recommender microbenchmarks on synthetic catalogs (default 200, 10k and 100k
+# exercises). Per catalog size:
+#   compile : CompiledCatalog construction (what a reload costs)
+#   score   : shortlist + vectorized signals + composite scores for one query
+#   score/learned : same, scored by a LinearScoringModel (the hand weights
+#             as a linear model, so only the scoring path differs)
+#   select  : full uncached recommendation (score, filter, diverse selection,
+#             dosage and rationale, ordering)
+#   cached  : recommend_exercises() once every query's result is cached
+# Queries are a fixed mix of (area, pain type, pain level) drawn with --seed.
+#
+# Run from ai-backend/:  python -m benchmarks.bench_recommender [--sizes 200,10000,100000] [--save NAME] [--compare NAME]
+import random, argparse, itertools
+from typing import List, Tuple
+
+from benchmarks.harness import Results, measure, add_baseline_args, report
+from benchmarks.synthetic import AREAS, synthetic_exercises
+from recommender import recommender
+from recommender.catalog import CompiledCatalog
+from recommender.scoring_model import LinearScoringModel, feature_matrix
+
+def query_mix(count: int, seed: int) -> List[Tuple[str, str, int]]:
+    rng = random.Random(seed)
+    pain_types = list(recommender.PAIN_TYPE_PREFERENCES)
+    # no exercise targets the forearm, so those queries take the related-areas fallback
+    areas = AREAS + ["forearm"]
+    return [(rng.choice(areas), rng.choice(pain_types), rng.randint(1, 10)) for _ in range(count)]
+
+def cycle(queries, fn):
+    """A no-argument callable running fn on the next query of the mix."""
+    queries = itertools.cycle(queries)
+    return lambda: fn(*next(queries))
+
+def bench_size(size: int, queries, rounds: int, compile_rounds: int) -> Results:
+    exercises = synthetic_exercises(size)
+    results: Results = {}
+    results[f"{size}/compile"] = measure(lambda: CompiledCatalog(exercises), compile_rounds, warmup=0)
+    catalog = CompiledCatalog(exercises)
+
+    def score(area, pain_type, level):
+        rows = catalog.rows_for_areas([area])
+        if not len(rows):
+            rows = catalog.rows_for_areas(["shoulder", "knee", "spine/core"])
+        signals = recommender._candidate_signals(catalog, rows, area, level, pain_type, [])
+        return recommender._composite_scores(signals)
+
+    learned = LinearScoringModel.from_weights(recommender.WEIGHTS)
+
+    def score_learned(area, pain_type, level):
+        rows = catalog.rows_for_areas([area])
+        if not len(rows):
+            rows = catalog.rows_for_areas(["shoulder", "knee", "spine/core"])
+        signals = recommender._candidate_signals(catalog, rows, area, level, pain_type, [])
+        # what _scores() does with a model: hand-weight eligibility, logits to rank on
+        return recommender._composite_scores(signals) > -1.0, learned.logits(feature_matrix(signals))
+
+    def select(area, pain_type, level):
+        return recommender._recommend_exercises_uncached(catalog, area, level, pain_type)
+
+    results[f"{size}/score"] = measure(cycle(queries, score), rounds)
+    results[f"{size}/score/learned"] = measure(cycle(queries, score_learned), rounds)
+    results[f"{size}/select"] = measure(cycle(queries, select), rounds)
+
+    recommender.catalog_manager.publish(exercises, etag=f"bench-{size}")
+    recommender.RESULT_CACHE.invalidate()
+    cached = cycle(queries, lambda area, pain_type, level: recommender.recommend_exercises(area, level, pain_type))
+    for _ in queries:
+        cached()
+    results[f"{size}/cached"] = measure(cached, rounds)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommender scoring and selection on synthetic catalogs")
+    parser.add_argument("--sizes", default="200,10000,100000")
+    parser.add_argument("--queries", type=int, default=50, help="distinct queries in the mix")
+    parser.add_argument("--rounds", type=int, default=200, help="timed calls per case")
+    parser.add_argument("--compile-rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    queries = query_mix(args.queries, args.seed)
+    results: Results = {}
+    for size in sizes:
+        results.update(bench_size(size, queries, args.rounds, args.compile_rounds))
+
+    params = {"sizes": sizes, "queries": args.queries, "rounds": args.rounds, "seed": args.seed}
+    report("recommender", results, args, params)
+
+if __name__ == "__main__":
+    main()
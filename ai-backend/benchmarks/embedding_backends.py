@@ -0,0 +1,128 @@
+# benchmarks/embedding_backends.py
+#
+# Offline comparison of the duplicate checker's embedding backends
+# (validators/embedding_backends.py). Replays labelled description pairs and,
+# for every backend, reports:
+#   agreement : final duplicate decisions identical to the reference backend
+#               (exact -> fuzzy -> semantic, same thresholds as the checker)
+#   flipped   : pairs whose decision changed, for review
+#   accuracy  : decisions matching the labels
+#   load time, RSS added by the model, single-text latency and batch throughput
+# Each backend is loaded in its own process so memory numbers don't overlap.
+#
+# Run from ai-backend/:  python -m benchmarks.embedding_backends [--backends mpnet,minilm-int8] [--pairs FILE]
+import os, time, argparse, statistics, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+
+from validators.embedding_backends import EMBEDDING_BACKENDS, DEFAULT_EMBEDDING_BACKEND
+from validators.text_matching import normalize_text, dynamic_threshold, fuzzy_similarity
+
+PAIRS_PATH = os.path.join(os.path.dirname(__file__), "data", "duplicate_pairs.tsv")
+
+def load_pairs(path: str = PAIRS_PATH) -> List[Tuple[str, str, int]]:
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                record, new, label = line.rstrip("\n").split("\t")
+                pairs.append((record, new, int(label)))
+    return pairs
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def profile_backend(name: str, texts: List[str], latency_samples: int) -> Dict:
+    """Runs in a fresh process: loads the backend, embeds every text, times it."""
+    from validators.embedding_backends import load_embedding_model
+
+    before = rss_mb()
+    start = time.perf_counter()
+    model = load_embedding_model(name)
+    load_s = time.perf_counter() - start
+    encode = lambda batch: model.encode(batch, convert_to_numpy=True, normalize_embeddings=True)
+    encode(texts[:1])  # warm-up
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        encode([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = encode(texts)
+    batch_s = time.perf_counter() - start
+    return {
+        "embeddings": dict(zip(texts, embeddings)),
+        "dim": int(embeddings.shape[1]),
+        "load_s": load_s,
+        "rss_mb": rss_mb() - before,
+        "p50_ms": statistics.median(latencies),
+        "throughput": len(texts) / batch_s,
+    }
+
+def decide(pairs: List[Tuple[str, str, int]], embeddings: Dict[str, np.ndarray]) -> Tuple[List[bool], List[bool]]:
+    """(final decisions, whether the transformer was the deciding stage) for every pair."""
+    decisions, semantic_decided = [], []
+    for record, new, _ in pairs:
+        record_norm, new_norm = normalize_text(record), normalize_text(new)
+        threshold = dynamic_threshold(record_norm)
+        if record_norm == new_norm or fuzzy_similarity(record_norm, new_norm) >= threshold:
+            decisions.append(True)
+            semantic_decided.append(False)
+        else:
+            decisions.append(float(embeddings[record_norm] @ embeddings[new_norm]) >= threshold)
+            semantic_decided.append(True)
+    return decisions, semantic_decided
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend agreement, latency and memory")
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS))
+    parser.add_argument("--reference", default=DEFAULT_EMBEDDING_BACKEND)
+    parser.add_argument("--pairs", default=PAIRS_PATH)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.pairs)
+    texts = sorted({normalize_text(t) for record, new, _ in pairs for t in (record, new)})
+    backends = [b for b in args.backends.split(",") if b]
+    if args.reference not in backends:
+        backends.insert(0, args.reference)
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(profile_backend, name, texts, args.latency_samples).result()
+
+    reference, semantic_decided = decide(pairs, results[args.reference]["embeddings"])
+    print(f"{len(pairs)} pairs ({sum(semantic_decided)} decided by the transformer), reference: {args.reference}\n")
+    print(f"{'backend':<12} {'dim':>4} {'agree':>7} {'accuracy':>9} {'load s':>7} {'RSS MB':>7} {'p50 ms':>7} {'texts/s':>8}")
+    flipped_by_backend = {}
+    for name in backends:
+        r = results[name]
+        decisions, _ = decide(pairs, r["embeddings"])
+        flipped_by_backend[name] = [i for i, (a, b) in enumerate(zip(reference, decisions)) if a != b]
+        agreement = 1 - len(flipped_by_backend[name]) / len(pairs)
+        accuracy = sum(d == bool(label) for d, (_, _, label) in zip(decisions, pairs)) / len(pairs)
+        print(
+            f"{name:<12} {r['dim']:>4} {agreement:>7.1%} {accuracy:>9.1%} {r['load_s']:>7.1f} "
+            f"{r['rss_mb']:>7.0f} {r['p50_ms']:>7.1f} {r['throughput']:>8.0f}"
+        )
+
+    for name, flipped in flipped_by_backend.items():
+        for i in flipped:
+            record, new, label = pairs[i]
+            print(f"\n[{name}] flipped to {not reference[i]} (label {label}): '{record}' <-> '{new}'")
+
+if __name__ == "__main__":
+    main()
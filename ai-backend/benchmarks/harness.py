@@ -0,0 +1,149 @@
+# benchmarks/harness.py
+#
+# Shared timing, reporting and baseline helpers for the benchmark scripts.
+#
+# Every benchmark produces a flat {case: {metric: value}} dict. Cases can be
+# saved as a named baseline (benchmarks/baselines/<suite>.<name>.json) and a
+# later run compared against it:
+#
+#   python -m benchmarks.bench_recommender --save before
+#   ... change the code ...
+#   python -m benchmarks.bench_recommender --compare before
+#
+# Comparisons flag a case when its p50 (or its throughput, for load tests) is
+# worse than the baseline by more than --tolerance.
+import os, sys, json, math, time, platform, statistics, argparse
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_DIR = os.getenv("BENCH_BASELINE_DIR", os.path.join(os.path.dirname(__file__), "baselines"))
+
+Results = Dict[str, Dict[str, float]]
+
+# -----------------------------
+# Timing
+# -----------------------------
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of unsorted samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def summarize(latencies_ms: List[float], elapsed_s: float, count: Optional[int] = None) -> Dict[str, float]:
+    count = len(latencies_ms) if count is None else count
+    return {
+        "n": count,
+        "mean_ms": statistics.fmean(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "ops_s": count / elapsed_s if elapsed_s > 0 else 0.0,
+    }
+
+def measure(fn: Callable[[], Any], rounds: int, warmup: int = 1) -> Dict[str, float]:
+    """Runs fn warmup + rounds times; latency stats over the timed rounds."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies, time.perf_counter() - started)
+
+async def measure_async(fn: Callable[[], Any], rounds: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        await fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies, time.perf_counter() - started)
+
+# -----------------------------
+# Reporting
+# -----------------------------
+COLUMNS = ("n", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "ops_s")
+
+def format_table(results: Results) -> str:
+    width = max([len("case")] + [len(case) for case in results])
+    lines = [f"{'case':<{width}} " + " ".join(f"{c:>10}" for c in COLUMNS)]
+    for case, row in results.items():
+        cells = []
+        for column in COLUMNS:
+            value = row.get(column)
+            cells.append(f"{'-':>10}" if value is None else f"{value:>10.0f}" if column == "n" else f"{value:>10.3f}")
+        lines.append(f"{case:<{width}} " + " ".join(cells))
+    return "\n".join(lines)
+
+# -----------------------------
+# Baselines
+# -----------------------------
+def baseline_path(suite: str, name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{suite}.{name}.json")
+
+def save_baseline(suite: str, name: str, results: Results, params: Dict[str, Any]) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(suite, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "suite": suite,
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "params": params,
+            "results": results,
+        }, f, indent=2)
+    return path
+
+def load_baseline(suite: str, name: str) -> Dict[str, Any]:
+    with open(baseline_path(suite, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """Prints current vs baseline per case; returns the cases that regressed beyond tolerance."""
+    regressions = []
+    width = max([len("case")] + [len(case) for case in results])
+    print(f"{'case':<{width}} {'base p50':>10} {'p50':>10} {'change':>8} {'base ops/s':>11} {'ops/s':>10} {'change':>8}")
+    for case, row in results.items():
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case:<{width}} {'(new case)':>10}")
+            continue
+        p50_change = row["p50_ms"] / base["p50_ms"] - 1 if base.get("p50_ms") else 0.0
+        ops_change = row["ops_s"] / base["ops_s"] - 1 if base.get("ops_s") else 0.0
+        regressed = p50_change > tolerance or ops_change < -tolerance
+        print(
+            f"{case:<{width}} {base['p50_ms']:>10.3f} {row['p50_ms']:>10.3f} {p50_change:>+8.1%} "
+            f"{base['ops_s']:>11.1f} {row['ops_s']:>10.1f} {ops_change:>+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+        if regressed:
+            regressions.append(case)
+    return regressions
+
+def add_baseline_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--save", metavar="NAME", help="save the results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="compare the results with baseline NAME")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before a case is flagged (default 0.10)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON instead of a table")
+
+def report(suite: str, results: Results, args: argparse.Namespace, params: Dict[str, Any]) -> None:
+    """Prints the results, then saves and/or compares baselines; exits 1 on a regression."""
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+    if args.compare:
+        print(f"\nvs baseline '{args.compare}':")
+        baseline = load_baseline(suite, args.compare)
+        if baseline.get("params") != params:
+            print(f"warning: baseline was run with different parameters {baseline.get('params')}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+    else:
+        regressions = []
+    if args.save:
+        print(f"\nbaseline saved to {save_baseline(suite, args.save, results, params)}")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+# benchmarks/in_memory_mongo.py
+#
+# A minimal async stand-in for the motor client, enough for the queries the
+# duplicate checker and metadata provider issue: find() with equality, $in,
+# $nin, $gte/$gt/$lte/$lt and $exists filters, projections, sort() and
+# to_list(); find_one(); insert_many(), with optional hash indexes.
+# Registering it as the "mongo_async" component lets benchmarks run the real
+# code paths without a database:
+#
+#   registry.register("mongo_async", lambda: client, fork_safe=False)
+#
+# Only single-field indexes exist and the rest of the filter is evaluated in
+# Python, so query cost is not representative of a real server; benchmarks
+# measure what happens around the query.
+from typing import Any, Dict, Iterable, List, Optional
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$nin" and value in operand:
+                return False
+            if op == "$exists" and (value is not None) != bool(operand):
+                return False
+            if op in ("$gte", "$gt", "$lte", "$lt") and value is None:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+        return True
+    return value == condition
+
+def matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    # a missing field compares as None, as in Mongo
+    return all(_matches_condition(document.get(field), condition) for field, condition in query.items())
+
+def project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return dict(document)
+    fields = {field for field, include in projection.items() if include}
+    return {key: value for key, value in document.items() if key in fields or key == "_id"}
+
+class InMemoryCursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+        self._position = 0
+
+    def sort(self, key: str, direction: int = 1) -> "InMemoryCursor":
+        # None sorts first ascending, like Mongo's null ordering
+        self._documents.sort(key=lambda d: (d.get(key) is not None, d.get(key)), reverse=direction < 0)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        end = len(self._documents) if length is None else self._position + length
+        batch = self._documents[self._position:end]
+        self._position += len(batch)
+        return batch
+
+class InMemoryCollection:
+    """
+    indexes: fields to keep a hash index on (like the real collection's
+    indexes); find() narrows to the index entries when the query has an
+    equality or $in condition on one of them, instead of scanning everything.
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]] = (), indexes: Iterable[str] = ()):
+        self.documents: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {field: {} for field in indexes}
+        self._add(documents)
+
+    def _add(self, documents: Iterable[Dict[str, Any]]) -> None:
+        for document in documents:
+            self.documents.append(document)
+            for field, index in self._indexes.items():
+                index.setdefault(document.get(field), []).append(document)
+
+    def _candidates(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        for field, index in self._indexes.items():
+            condition = query.get(field, ...)
+            if condition is ...:
+                continue
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                return [d for value in dict.fromkeys(condition["$in"]) for d in index.get(value, [])]
+            if not isinstance(condition, dict):
+                return index.get(condition, [])
+        return self.documents
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> InMemoryCursor:
+        query = query or {}
+        return InMemoryCursor([project(d, projection) for d in self._candidates(query) if matches(d, query)])
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None):
+        found = await self.find(query, projection).to_list(length=1)
+        return found[0] if found else None
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]]) -> None:
+        self._add(documents)
+
+    def insert_many_now(self, documents: Iterable[Dict[str, Any]]) -> None:
+        """Synchronous insert for setting up fixtures outside the event loop."""
+        self._add(documents)
+
+class InMemoryDatabase(dict):
+    def __missing__(self, name: str) -> InMemoryCollection:
+        collection = self[name] = InMemoryCollection()
+        return collection
+
+class InMemoryMongoClient(dict):
+    def __missing__(self, name: str) -> InMemoryDatabase:
+        database = self[name] = InMemoryDatabase()
+        return database
+
+    def close(self) -> None:
+        pass
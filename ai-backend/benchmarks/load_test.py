@@ -0,0 +1,142 @@
+# benchmarks/load_test.py
+#
+# HTTP load test against a running ai-backend (uvicorn main:app, serve.py, or
+# a deployed instance). A fixed number of concurrent clients each send
+# requests back to back for --duration seconds after a --warmup period, and
+# the run reports throughput, latency percentiles and the status codes seen,
+# per endpoint:
+#   recommend  : POST /ai/recommend
+#   validate   : POST /ai/validate/
+#   duplicates : POST /ai/checkDuplicates/
+#   intake     : POST /ai/intake/
+#   metrics    : GET  /ai/metrics
+# Payloads rotate through benchmarks/data/descriptions.txt and a mix of
+# injury places, pain types and pain levels; each request uses a fresh user
+# email unless --users is given, so duplicate checks see empty or shared
+# histories accordingly. --slip-kb attaches a base64 doctorSlip of that size,
+# as the Node backend forwards it. Non-2xx responses are counted, not treated as
+# failures of the run (validation rejects part of the corpus by design);
+# connection errors are reported separately.
+#
+# Run from ai-backend/:
+#   python -m benchmarks.load_test --url http://127.0.0.1:8000 --endpoints recommend,intake --concurrency 32 [--save NAME] [--compare NAME]
+import os, time, base64, random, asyncio, argparse, itertools
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.harness import Results, summarize, add_baseline_args, report
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "descriptions.txt")
+INJURY_PLACES = ["knee", "shoulder", "neck", "hip", "spine/core", "ankle/foot", "wrist/hand", "elbow"]
+
+ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    "recommend": ("POST", "/ai/recommend"),
+    "validate": ("POST", "/ai/validate/"),
+    "duplicates": ("POST", "/ai/checkDuplicates/"),
+    "intake": ("POST", "/ai/intake/"),
+    "metrics": ("GET", "/ai/metrics"),
+}
+
+def payload_factory(pain_types: List[str], users: int, seed: int, slip_kb: int = 0) -> Callable[[], Dict[str, Any]]:
+    rng = random.Random(seed)
+    slip = {"data": base64.b64encode(rng.randbytes(slip_kb * 1024)).decode(), "contentType": "image/jpeg"} if slip_kb else None
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        descriptions = itertools.cycle([line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")])
+    counter = itertools.count()
+
+    def make() -> Dict[str, Any]:
+        n = next(counter)
+        user = n % users if users else n
+        payload = {
+            "userId": f"load-{user}",
+            "userEmail": f"load-{user}@bench.local",
+            "injuryPlace": rng.choice(INJURY_PLACES),
+            "painType": rng.choice(pain_types),
+            "painLevel": rng.randint(1, 10),
+            "description": next(descriptions),
+        }
+        if slip:
+            payload["doctorSlip"] = slip
+        return payload
+    return make
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    make_payload: Callable[[], Dict[str, Any]],
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> Dict[str, Any]:
+    method, path = ENDPOINTS[endpoint]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        while loop.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                if method == "GET":
+                    response = await client.get(path)
+                else:
+                    response = await client.post(path, json=make_payload())
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = None
+                errors[type(e).__name__] += 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if loop.time() >= measure_from and status is not None:
+                latencies.append(elapsed_ms)
+                statuses[status] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = summarize(latencies, duration)
+    stats["non_2xx_ratio"] = sum(c for s, c in statuses.items() if not 200 <= s < 300) / max(1, len(latencies))
+    return {"stats": stats, "statuses": dict(statuses), "errors": dict(errors)}
+
+async def run_load_test(args) -> Results:
+    make_payload = payload_factory(args.pain_types.split(","), args.users, args.seed, args.slip_kb)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results: Results = {}
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        for endpoint in args.endpoints.split(","):
+            outcome = await run_endpoint(client, endpoint, make_payload, args.concurrency, args.duration, args.warmup)
+            results[f"{endpoint}/c{args.concurrency}"] = outcome["stats"]
+            print(f"{endpoint}: statuses {outcome['statuses']}" + (f", errors {outcome['errors']}" if outcome["errors"] else ""))
+    print()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test: throughput and latency percentiles per endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoints", default="recommend", help=f"comma-separated, from {','.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each endpoint")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--pain-types", default="sharp,dull,aching,stiffness", help="must be allowed by the server's pain types")
+    parser.add_argument("--users", type=int, default=0, help="rotate through this many users (0: a new user per request)")
+    parser.add_argument("--slip-kb", type=int, default=0, help="attach a doctorSlip of this many KiB to every payload")
+    parser.add_argument("--seed", type=int, default=5)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    unknown = [e for e in args.endpoints.split(",") if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {unknown}")
+
+    results = asyncio.run(run_load_test(args))
+    params = {
+        "url": args.url, "endpoints": args.endpoints, "concurrency": args.concurrency,
+        "duration": args.duration, "users": args.users, "slip_kb": args.slip_kb, "seed": args.seed
+    }
+    report("load", results, args, params)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/synthetic.py
+#
+# Deterministic synthetic data for the benchmarks: exercise catalogs of any
+# size (ExerciseRecord rows, as load_exercises() returns them) and per-user
+# pain histories (documents shaped like the PainData collection).
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+from recommender.recommender import PAIN_TYPE_PREFERENCES, CONTRAINDICATION_TAGS
+from recommender.exercise_record import ExerciseRecord
+from validators.text_matching import normalize_text
+
+# ---------- Exercise catalogs ----------
+AREAS = [
+    "neck", "shoulder", "elbow", "wrist/hand", "spine/core", "hip", "knee",
+    "ankle/foot", "chest", "pelvis", "lumbar", "thoracic"
+]
+EFFECTS = sorted(
+    {"mobility", "strengthening", "postural_control", "neural_glide", "stability", "posture_control",
+     "range_of_motion", "balance", "proprioception", "activation"}
+    | {e for prefs in PAIN_TYPE_PREFERENCES.values() for key in ("prefer_effects", "avoid_effects") for e in prefs[key]}
+)
+CONTRAINDICATIONS = sorted(
+    {"avoid_for_acute_injury", "avoid_overhead_if_painful", "avoid_heavy_loads", "avoid_high_impact",
+     "avoid_if_sharp", "avoid_if_radiating", "avoid_knee_flexion_load", "avoid_neck_extension"}
+    | set(CONTRAINDICATION_TAGS["red_flags"])
+)
+EQUIPMENT = ["none"] * 6 + ["resistance band", "dumbbell", "foam roller", "towel", "wall", "chair", "stability ball"]
+INTENSITIES = ["low", "medium", "high"]
+MOVEMENTS = ["flexion", "extension", "rotation", "bridge", "hold", "slide", "raise", "press", "stretch", "glide"]
+
+def synthetic_exercises(count: int, seed: int = 7) -> List[ExerciseRecord]:
+    """count unique exercises, as load_exercises() returns them."""
+    rng = random.Random(seed)
+    exercises = []
+    for i in range(count):
+        area = rng.choice(AREAS)
+        exercise_type = "hold" if rng.random() < 0.3 else "repetition"
+        name = f"{area} {rng.choice(MOVEMENTS)} {i}"
+        exercises.append(ExerciseRecord(**{
+            "exerciseName": name,
+            "exerciseType": exercise_type,
+            "targetArea": area,
+            "rep": None if exercise_type == "hold" else rng.choice([8, 10, 12, 15, 20]),
+            "holdTime": rng.choice([10, 20, 30]) if exercise_type == "hold" else None,
+            "set": rng.choice([2, 3, 4]),
+            "difficulty": rng.choice(["easy", "medium", "hard"]),
+            "equipmentNeeded": rng.choice(EQUIPMENT),
+            "aiTrackingEnabled": rng.random() < 0.8,
+            "description": f"{name}: perform as instructed to mobilize/strengthen the {area} region.",
+            "demoVideo": f"https://www.youtube.com/watch?v=synthetic{i:06d}",
+            "image": "",
+            "imageId": None,
+            "intensity": rng.choice(INTENSITIES),
+            "intended_effects": rng.sample(EFFECTS, rng.randint(1, 3)),
+            "contraindications": rng.sample(CONTRAINDICATIONS, rng.randint(0, 2)),
+            "movement_plane": rng.choice(["sagittal", "frontal", "transverse"]),
+            "progressions": ["intermediate variation"] if rng.random() < 0.45 else [],
+        }))
+    return exercises
+
+# ---------- Pain histories ----------
+SYMPTOMS = [
+    "sharp pain", "dull ache", "stiffness", "swelling", "burning sensation", "tingling",
+    "throbbing", "weakness", "clicking", "cramping", "radiating pain", "tightness"
+]
+TRIGGERS = [
+    "after running", "when climbing stairs", "in the morning", "after sitting for long",
+    "when lifting", "during sleep", "after work", "when bending", "while typing", "after football"
+]
+DETAILS = [
+    "getting worse every day", "started last week", "on the left side", "on the right side",
+    "improves with rest", "worse in cold weather", "since a fall", "comes and goes"
+]
+
+def synthetic_description(rng: random.Random, injury_place: str) -> str:
+    return f"{rng.choice(SYMPTOMS)} in my {injury_place} {rng.choice(TRIGGERS)}, {rng.choice(DETAILS)}"
+
+def synthetic_history(
+    user_email: str,
+    injury_place: str,
+    count: int,
+    seed: int = 11,
+    now: datetime = None
+) -> List[Dict[str, Any]]:
+    """count PainData documents for one user and injury place, one every ~3 days going back from 30 days ago."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        {
+            "_id": ObjectId(),
+            "userEmail": user_email,
+            "injuryPlace": injury_place,
+            "normalizedInjuryPlace": normalize_text(injury_place),
+            "painType": rng.choice(list(PAIN_TYPE_PREFERENCES)),
+            "painLevel": rng.randint(1, 10),
+            "description": synthetic_description(rng, injury_place),
+            "createdAt": now - timedelta(days=30 + 3 * i, minutes=rng.randint(0, 600)),
+        }
+        for i in range(count)
+    ]
@@ -1,11 +1,90 @@
-from fastapi import FastAPI
-from validators.pain_data_validation import router as pain_validation_router
-from validators.pain_data_duplicates import router as pain_duplicates_router
+import os, time, asyncio, logging
+from contextlib import asynccontextmanager
+_imports_started = time.perf_counter()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from validators.pain_data_validation import router as pain_validation_router, validation_pool
+from validators.pain_data_duplicates import router as pain_duplicates_router, duplicates_pool, start_routine_watch, routine_states
+from validators.pain_data_intake import router as pain_intake_router
 from recommender.recommend_router import router as recommend_router
+from recommender.recommender import warm_recommendation_cache, catalog_manager
+from models.pain_data import PAIN_TYPES_KEY
+from utils.metadata_provider import metadata_provider
+from utils.database import close_sync_client
+from utils.registry import registry
+from utils.metrics import metrics, REQUEST_LATENCY
+
+logger = logging.getLogger("AI Physio Backend")
+registry.record("imports", time.perf_counter() - _imports_started)
+
+# Models, clients and the exercise catalog load on first use. AI_PRELOAD
+# ("all" or a comma-separated list of registry names, e.g.
+# "spacy,spellchecker,embedding_model") loads them at startup instead.
+AI_PRELOAD = os.getenv("AI_PRELOAD", "")
+
+def _preload_names():
+    return None if AI_PRELOAD.strip() == "all" else [n.strip() for n in AI_PRELOAD.split(",") if n.strip()]
+
+async def warm_metadata_cache():
+    # load pain types off the event loop so the first PainData validation is a cache hit
+    try:
+        await metadata_provider.refresh(PAIN_TYPES_KEY)
+    except Exception as e:
+        logger.warning(f"Could not preload pain types: {e}")
+
+async def warm_recommendation_results():
+    if os.getenv("RECOMMEND_CACHE_WARMUP", "0") == "1":
+        count = await asyncio.to_thread(warm_recommendation_cache)
+        logger.info(f"Recommendation cache warmed with {count} entries")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AI_PRELOAD:
+        await asyncio.to_thread(registry.preload, _preload_names())
+    started = time.perf_counter()
+    await warm_metadata_cache()
+    await warm_recommendation_results()
+    catalog_manager.start_watching()
+    start_routine_watch()
+    registry.record("cache warmup", time.perf_counter() - started)
+    logger.info(registry.format_report())
+
+    yield
+
+    catalog_manager.stop_watching()
+    await routine_states.stop_watching()
+    validation_pool.shutdown()
+    duplicates_pool.shutdown()
+    registry.close_all()
+    close_sync_client()
+
+app = FastAPI(title="AI Physio Backend", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/ai/assets/{asset_id}), not the raw path
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
 
-app = FastAPI(title="AI Physio Backend")
+@app.get("/ai/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # Include routers
 app.include_router(pain_validation_router)
 app.include_router(pain_duplicates_router)
 app.include_router(recommend_router)
+app.include_router(pain_intake_router)
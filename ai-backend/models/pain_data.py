@@ -1,33 +1,30 @@
 # models/pain_data.py
 from pydantic import BaseModel, Field, validator
 from typing import Optional
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
+from utils.metadata_provider import metadata_provider
 
-load_dotenv()  # make sure .env is loaded
+PAIN_TYPES_KEY = "pain_types"
 
 def get_allowed_pain_types():
-    client = MongoClient(os.getenv("MONGO_URI"))
-    db = client[os.getenv("DB_NAME")]
-    meta_collection = db[os.getenv("METADATA_COLL")]
-    meta = meta_collection.find_one({"dataName": "pain_types"})
-    if meta and "data" in meta:
-        return meta["data"]
-    return []
+    # served from the shared in-memory cache; Mongo is only hit on a cold or stale entry
+    return metadata_provider.get(PAIN_TYPES_KEY)
 
 class DoctorSlip(BaseModel):
     data: Optional[bytes] = None
     contentType: Optional[str] = None
 
-class PainData(BaseModel):
+class PainSubmission(BaseModel):
+    """
+    A pain-data submission as the AI stages see it: everything but the doctor
+    slip, which none of them read. utils.ingest drops the slip from the body
+    before parsing, so it is never decoded or validated.
+    """
     userId: str
     userEmail: str
     injuryPlace: str
     painType: str  # we will validate dynamically
     painLevel: int = Field(ge=1, le=10, description="Pain level between 1 (mild) and 10 (severe)")
     description: Optional[str] = None
-    doctorSlip: Optional[DoctorSlip] = None
 
     @validator("painType")
     def validate_pain_type(cls, v):
@@ -35,3 +32,7 @@ class PainData(BaseModel):
         if v not in allowed:
             raise ValueError(f"painType must be one of {allowed}")
         return v
+
+class PainData(PainSubmission):
+    """The full document, slip included; parse it with read_model(..., skip=frozenset()) when a stage needs the slip."""
+    doctorSlip: Optional[DoctorSlip] = None
@@ -0,0 +1,92 @@
+# recommender/asset_store.py
+import os, re, mmap, base64, binascii, hashlib, logging, threading
+from typing import Dict, Optional
+
+# ---------- Content-addressed asset store ----------
+# Binary assets (exercise images) live on disk as <root>/<aa>/<sha256>.<ext>.
+# The asset id is "<sha256>.<ext>", so identical images are stored once and the
+# id doubles as a strong ETag. Reads are memory-mapped and the maps are kept
+# open, so serving an image does not copy it into the Python heap until the
+# response body is built.
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "bin": "application/octet-stream",
+}
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+ASSET_ID_RE = re.compile(r"^[0-9a-f]{64}\.(jpg|png|gif|webp|bin)$")
+DATA_URI_RE = re.compile(r"^data:([\w/+.-]+);base64,", re.IGNORECASE)
+
+logger = logging.getLogger("recommender.asset_store")
+
+
+class AssetStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def path(self, asset_id: str) -> str:
+        return os.path.join(self.root, asset_id[:2], asset_id)
+
+    def put(self, data: bytes, content_type: str) -> str:
+        ext = EXTENSIONS.get(content_type.lower(), "bin")
+        asset_id = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        path = self.path(asset_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # atomic, so concurrent loaders never see a partial file
+        return asset_id
+
+    def put_data_uri(self, uri: str) -> Optional[str]:
+        """Store the payload of a base64 data URI; returns None if `uri` is not one (or is malformed)."""
+        match = DATA_URI_RE.match(uri or "")
+        if not match:
+            return None
+        try:
+            data = base64.b64decode(uri[match.end():])
+        except (binascii.Error, ValueError) as e:
+            logger.warning(f"Skipping malformed {match.group(1)} data URI: {e}")
+            return None
+        return self.put(data, match.group(1))
+
+    def exists(self, asset_id: str) -> bool:
+        return bool(ASSET_ID_RE.match(asset_id)) and os.path.exists(self.path(asset_id))
+
+    def open(self, asset_id: str) -> Optional[mmap.mmap]:
+        """Read-only memory map of the asset, or None if the id is invalid or unknown."""
+        mapped = self._maps.get(asset_id)
+        if mapped is not None:
+            return mapped
+        if not self.exists(asset_id):
+            return None
+        with self._lock:
+            mapped = self._maps.get(asset_id)
+            if mapped is None:
+                with open(self.path(asset_id), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[asset_id] = mapped
+        return mapped
+
+    @staticmethod
+    def content_type(asset_id: str) -> str:
+        return CONTENT_TYPES.get(asset_id.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def data_uri(self, asset_id: str) -> Optional[str]:
+        mapped = self.open(asset_id)
+        if mapped is None:
+            return None
+        return f"data:{self.content_type(asset_id)};base64,{base64.b64encode(mapped).decode('ascii')}"
@@ -0,0 +1,244 @@
+# recommender/catalog.py
+from typing import List, Dict, Any, Iterable, Callable, Optional, Tuple
+import io, os, hashlib, threading, logging
+import numpy as np
+from recommender.exercise_record import ExerciseRecord, as_record
+
+logger = logging.getLogger("recommender.catalog")
+
+# ---------- Compiled exercise catalog ----------
+# Built once from the parsed rows so that per-request scoring is a few array
+# operations instead of Python loops that rebuild sets for every exercise.
+#
+# Rows are kept as given in `exercises` (load_exercises() records, or dicts
+# assigned by hand) and as ExerciseRecords in `records`; the two lists share
+# the objects when the source rows already are records. A row sequence that
+# carries `compiled_columns` (a precompiled artifact, see catalog_artifact.py)
+# is used as is, without recompiling.
+#
+# Encodings (one row per exercise, same order as the source list):
+#   area_codes / intensity_codes / equipment_codes : int32 codes into *_vocab
+#   effects / contras                              : bool matrices (exercise x tag)
+#   has_progressions                               : bool
+# Indexes:
+#   area_index  : targetArea -> int array of row positions (source order)
+#   area_counts : targetArea -> number of rows
+
+COLUMN_NAMES = (
+    "area_codes", "area_vocab", "intensity_codes", "intensity_vocab", "equipment_codes", "equipment_vocab",
+    "effects", "effect_vocab", "contras", "contra_vocab", "has_progressions"
+)
+
+def _encode(values: Iterable[str]):
+    vocab: Dict[str, int] = {}
+    codes = [vocab.setdefault(v, len(vocab)) for v in values]
+    return np.asarray(codes, dtype=np.int32), list(vocab)
+
+def _encode_tags(rows: List[List[str]]):
+    vocab: Dict[str, int] = {}
+    for tags in rows:
+        for t in tags:
+            vocab.setdefault(t, len(vocab))
+    matrix = np.zeros((len(rows), len(vocab)), dtype=bool)
+    for i, tags in enumerate(rows):
+        for t in tags:
+            matrix[i, vocab[t]] = True
+    return matrix, list(vocab)
+
+def compile_columns(records: List[ExerciseRecord]) -> Dict[str, Any]:
+    """The encoded columns (COLUMN_NAMES) of a list of records."""
+    columns: Dict[str, Any] = {}
+    columns["area_codes"], columns["area_vocab"] = _encode(ex.targetArea for ex in records)
+    columns["intensity_codes"], columns["intensity_vocab"] = _encode(ex.intensity for ex in records)
+    columns["equipment_codes"], columns["equipment_vocab"] = _encode((ex.equipmentNeeded or "").lower() for ex in records)
+    columns["effects"], columns["effect_vocab"] = _encode_tags([ex.intended_effects for ex in records])
+    columns["contras"], columns["contra_vocab"] = _encode_tags([ex.contraindications for ex in records])
+    columns["has_progressions"] = np.asarray([bool(ex.progressions) for ex in records], dtype=bool)
+    return columns
+
+
+class CompiledCatalog:
+    def __init__(self, exercises: List[Dict[str, Any]], version: int = 0, etag: str = ""):
+        self.exercises = exercises
+        self.size = len(exercises)
+        self.version = version
+        self.etag = etag
+
+        columns = getattr(exercises, "compiled_columns", None)
+        if columns is not None:
+            self.records = exercises
+        else:
+            self.records = [as_record(ex) for ex in exercises]
+            columns = compile_columns(self.records)
+        for name in COLUMN_NAMES:
+            setattr(self, name, columns[name])
+
+        # rows of each area in source order: a stable sort by area code, split per code
+        order = np.argsort(self.area_codes, kind="stable").astype(np.intp)
+        counts = np.bincount(self.area_codes, minlength=len(self.area_vocab))
+        self.area_index: Dict[str, np.ndarray] = dict(zip(self.area_vocab, np.split(order, np.cumsum(counts)[:-1])))
+        self.area_counts = {area: len(rows) for area, rows in self.area_index.items()}
+
+    # ---------- candidate lookup ----------
+    def rows_for_areas(self, areas: Iterable[str]) -> np.ndarray:
+        parts = [self.area_index[a] for a in set(areas) if a in self.area_index]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    # ---------- vectorized predicates over a set of rows ----------
+    def area_is(self, rows: np.ndarray, area: str) -> np.ndarray:
+        return self._code_in(self.area_codes, self.area_vocab, rows, lambda v: v == area)
+
+    def intensity_in(self, rows: np.ndarray, values: Iterable[str]) -> np.ndarray:
+        values = set(values)
+        return self._code_in(self.intensity_codes, self.intensity_vocab, rows, lambda v: v in values)
+
+    def equipment_where(self, rows: np.ndarray, predicate: Callable[[str], bool]) -> np.ndarray:
+        return self._code_in(self.equipment_codes, self.equipment_vocab, rows, predicate)
+
+    def has_any_effect(self, rows: np.ndarray, effects: Iterable[str]) -> np.ndarray:
+        wanted = set(effects)
+        return self._tags_any(self.effects, self.effect_vocab, rows, lambda t: t in wanted)
+
+    def has_any_contra(self, rows: np.ndarray, predicate: Callable[[str], bool]) -> np.ndarray:
+        return self._tags_any(self.contras, self.contra_vocab, rows, predicate)
+
+    @staticmethod
+    def _code_in(codes, vocab, rows, predicate) -> np.ndarray:
+        lookup = np.asarray([bool(predicate(v)) for v in vocab], dtype=bool)
+        if not len(lookup):
+            return np.zeros(len(rows), dtype=bool)
+        return lookup[codes[rows]]
+
+    @staticmethod
+    def _tags_any(matrix, vocab, rows, predicate) -> np.ndarray:
+        cols = [i for i, t in enumerate(vocab) if predicate(t)]
+        if not cols:
+            return np.zeros(len(rows), dtype=bool)
+        return matrix[np.ix_(rows, cols)].any(axis=1)
+
+
+# ---------- Catalog sources ----------
+class CsvCatalogSource:
+    """
+    Exercise CSV on disk; fingerprint() is a cheap stat used to detect changes.
+    parse(lines) turns the CSV text (an iterable of lines, as csv.reader
+    takes) into rows.
+    """
+
+    def __init__(self, path: str, parse: Callable[[Iterable[str]], List[Dict[str, Any]]]):
+        self.path = path
+        self.parse = parse
+
+    def fingerprint(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        (rows, etag) from one read of the file: the etag is the digest of the
+        bytes that were parsed, even if the file is rewritten meanwhile.
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        rows = self.parse(io.StringIO(data.decode("utf-8"), newline=""))
+        return rows, hashlib.sha256(data).hexdigest()[:16]
+
+
+# ---------- Hot-reloadable catalog ----------
+class CatalogManager:
+    """
+    Owns the live CompiledCatalog.
+    - Readers take `manager.current` once per request and use only that
+      snapshot, so the read path is a single attribute access with no locking
+      and in-flight requests finish on the version they started with.
+    - Writers (reload/publish) parse and compile the new catalog off to the
+      side, then swap the reference; listeners run while the swap lock is held.
+    - A background thread can poll the source and reload when it changes.
+    """
+
+    def __init__(self, source, poll_interval: float = 0.0):
+        self.source = source
+        self.poll_interval = poll_interval
+        self._current: Optional[CompiledCatalog] = None
+        self._fingerprint = None
+        self._version = 0
+        self._listeners: List[Callable[[CompiledCatalog], None]] = []
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # first load only; concurrent first readers wait for it
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> CompiledCatalog:
+        catalog = self._current
+        if catalog is None:
+            with self._load_lock:
+                if self._current is None:
+                    self.reload(force=True)
+            catalog = self._current
+        return catalog
+
+    def add_listener(self, callback: Callable[[CompiledCatalog], None]) -> None:
+        self._listeners.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload from the source if it changed (or force). Returns True when a new version was swapped in."""
+        fingerprint = self.source.fingerprint()
+        if not force and fingerprint == self._fingerprint:
+            return False
+        exercises, etag = self.source.load()
+        with self._lock:
+            self._publish_locked(exercises, etag)
+            self._fingerprint = fingerprint
+        logger.info(f"Exercise catalog v{self._version} loaded ({len(exercises)} rows, etag {etag})")
+        return True
+
+    def publish(self, exercises: List[Dict[str, Any]], etag: Optional[str] = None) -> CompiledCatalog:
+        """Swap in an in-memory exercise list (e.g. from a test or another source)."""
+        with self._lock:
+            return self._publish_locked(exercises, etag)
+
+    def adopt(self, get_exercises: Callable[[], List[Dict[str, Any]]]) -> CompiledCatalog:
+        """
+        Publish get_exercises() unless the current snapshot already wraps that
+        list at its current length (checked under the swap lock).
+        """
+        with self._lock:
+            exercises = get_exercises()
+            current = self._current
+            if current is not None and current.exercises is exercises and current.size == len(exercises):
+                return current
+            return self._publish_locked(exercises, None)
+
+    def _publish_locked(self, exercises, etag) -> CompiledCatalog:
+        version = self._version + 1
+        catalog = CompiledCatalog(exercises, version=version, etag=etag or f"mem-{version}")
+        self._version = version
+        self._current = catalog
+        for callback in self._listeners:
+            callback(catalog)
+        return catalog
+
+    # ---------- background watcher ----------
+    def start_watching(self) -> None:
+        if self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                # keep serving the previous version; retry on the next tick
+                logger.warning(f"Exercise catalog reload failed: {e}")
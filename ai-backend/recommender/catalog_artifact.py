@@ -0,0 +1,236 @@
+# recommender/catalog_artifact.py
+import os, json, mmap, shutil, hashlib, logging
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from recommender.catalog import COLUMN_NAMES, CsvCatalogSource, compile_columns
+from recommender.exercise_record import ExerciseRecord
+
+logger = logging.getLogger("recommender.catalog_artifact")
+
+# ---------- Precompiled catalog artifact ----------
+# `python -m recommender.catalog_artifact compile` parses exercises.csv once
+# and writes everything the recommender needs as NumPy arrays next to it:
+#
+#   <artifact>/manifest.json          format version, source CSV hash/stat, vocabularies,
+#                                     and the build directory currently in use
+#   <artifact>/<build>/*.npy          compiled columns (see catalog.COLUMN_NAMES) and
+#                                     the record fields, one array per field
+#   <artifact>/<build>/strings.bin    UTF-8 string table (each distinct string once)
+#   <artifact>/<build>/string_offsets.npy
+#
+# String fields are int32 indexes into the string table (-1 for None), integer
+# fields are int64 (INT_NONE for None), tag lists are CSR pairs
+# (<field>_offsets, <field>_values). Workers open the arrays with mmap, so
+# loading does no parsing and every worker shares the same page-cache pages.
+# Rows become ExerciseRecords only when a request selects them.
+#
+# The artifact records the CSV's sha256; the loader falls back to the CSV
+# when it no longer matches (or the artifact is missing or of another format).
+# Each compile writes a new build directory and then swaps manifest.json, so
+# running workers keep reading the build they mapped.
+
+FORMAT_VERSION = 1
+INT_NONE = np.iinfo(np.int64).min
+
+STRING_FIELDS = (
+    "exerciseName", "exerciseType", "targetArea", "difficulty", "equipmentNeeded",
+    "description", "demoVideo", "image", "imageId", "intensity", "movement_plane"
+)
+INT_FIELDS = ("rep", "holdTime", "set")
+TAG_FIELDS = ("intended_effects", "contraindications", "progressions")
+ARRAY_COLUMNS = tuple(name for name in COLUMN_NAMES if not name.endswith("_vocab"))
+VOCAB_COLUMNS = tuple(name for name in COLUMN_NAMES if name.endswith("_vocab"))
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ---------- Writing ----------
+def write_artifact(records: List[ExerciseRecord], artifact_dir: str, source_path: str, externalized_images: bool) -> str:
+    """Writes a new build of the artifact for `records` (parsed from source_path); returns its directory."""
+    st = os.stat(source_path)
+    source_sha = file_sha256(source_path)
+    build = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{source_sha[:12]}"
+    build_dir = os.path.join(artifact_dir, build)
+    os.makedirs(build_dir, exist_ok=True)
+
+    strings: Dict[str, int] = {}
+    def string_id(value: Optional[str]) -> int:
+        return -1 if value is None else strings.setdefault(value, len(strings))
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name in STRING_FIELDS:
+        arrays[name] = np.asarray([string_id(getattr(ex, name)) for ex in records], dtype=np.int32)
+    for name in INT_FIELDS:
+        arrays[name] = np.asarray([INT_NONE if getattr(ex, name) is None else getattr(ex, name) for ex in records], dtype=np.int64)
+    arrays["aiTrackingEnabled"] = np.asarray([bool(ex.aiTrackingEnabled) for ex in records], dtype=bool)
+    for name in TAG_FIELDS:
+        lengths = [len(getattr(ex, name)) for ex in records]
+        arrays[f"{name}_offsets"] = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+        arrays[f"{name}_values"] = np.asarray([string_id(tag) for ex in records for tag in getattr(ex, name)], dtype=np.int32)
+
+    columns = compile_columns(records)
+    for name in ARRAY_COLUMNS:
+        arrays[name] = columns[name]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    arrays["string_offsets"] = np.concatenate([[0], np.cumsum([len(b) for b in encoded], dtype=np.int64)]).astype(np.int64)
+    with open(os.path.join(build_dir, "strings.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    for name, array in arrays.items():
+        np.save(os.path.join(build_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "build": build,
+        "rows": len(records),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "source": {"path": os.path.abspath(source_path), "sha256": source_sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns},
+        "externalized_images": externalized_images,
+        "vocab": {name: columns[name] for name in VOCAB_COLUMNS},
+    }
+    manifest_path = os.path.join(artifact_dir, "manifest.json")
+    previous = read_manifest(artifact_dir)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # mapped files stay readable after unlink, so workers on the old build are unaffected
+    if previous and previous.get("build") not in (None, build):
+        shutil.rmtree(os.path.join(artifact_dir, previous["build"]), ignore_errors=True)
+    return build_dir
+
+def read_manifest(artifact_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(artifact_dir, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# ---------- Reading ----------
+class ArtifactExercises(Sequence):
+    """
+    The rows of an artifact build, backed by memory-mapped arrays. Rows are
+    decoded into ExerciseRecords on first access and kept, so a row is always
+    the same object. `compiled_columns` lets CompiledCatalog skip compiling.
+    """
+
+    def __init__(self, build_dir: str, manifest: Dict[str, Any]):
+        self.build_dir = build_dir
+        self.rows = manifest["rows"]
+        load = lambda name: np.load(os.path.join(build_dir, f"{name}.npy"), mmap_mode="r")
+        self._arrays = {name: load(name) for name in STRING_FIELDS + INT_FIELDS + ("aiTrackingEnabled",)}
+        for name in TAG_FIELDS:
+            self._arrays[f"{name}_offsets"] = load(f"{name}_offsets")
+            self._arrays[f"{name}_values"] = load(f"{name}_values")
+        self._string_offsets = load("string_offsets")
+        with open(os.path.join(build_dir, "strings.bin"), "rb") as f:
+            # an empty file can't be mapped
+            self._strings = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        self.compiled_columns = {name: load(name) for name in ARRAY_COLUMNS}
+        self.compiled_columns.update(manifest["vocab"])
+        self._records: List[Optional[ExerciseRecord]] = [None] * self.rows
+
+    def _string(self, index: int) -> Optional[str]:
+        if index < 0:
+            return None
+        return self._strings[int(self._string_offsets[index]):int(self._string_offsets[index + 1])].decode("utf-8")
+
+    def _decode(self, row: int) -> ExerciseRecord:
+        a = self._arrays
+        fields: Dict[str, Any] = {name: self._string(int(a[name][row])) for name in STRING_FIELDS}
+        for name in INT_FIELDS:
+            value = int(a[name][row])
+            fields[name] = None if value == INT_NONE else value
+        fields["aiTrackingEnabled"] = bool(a["aiTrackingEnabled"][row])
+        for name in TAG_FIELDS:
+            start, end = int(a[f"{name}_offsets"][row]), int(a[f"{name}_offsets"][row + 1])
+            fields[name] = [self._string(int(i)) for i in a[f"{name}_values"][start:end]]
+        return ExerciseRecord(**fields)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("exercise index out of range")
+        record = self._records[index]
+        if record is None:
+            record = self._records[index] = self._decode(index)
+        return record
+
+    def __len__(self) -> int:
+        return self.rows
+
+# ---------- Catalog source ----------
+class ArtifactCatalogSource(CsvCatalogSource):
+    """
+    The exercise CSV, served from its precompiled artifact when that is up to
+    date. The artifact is skipped (and the CSV parsed as before) when it is
+    missing, of another format, built from different CSV contents, or built
+    with a different image mode (externalized vs inline) than this process.
+    """
+
+    def __init__(self, path: str, parse, artifact_dir: str, externalized_images: bool):
+        super().__init__(path, parse)
+        self.artifact_dir = artifact_dir
+        self.externalized_images = externalized_images
+
+    def fingerprint(self):
+        # a recompiled artifact counts as a change too
+        try:
+            manifest_mtime = os.stat(os.path.join(self.artifact_dir, "manifest.json")).st_mtime_ns
+        except OSError:
+            manifest_mtime = None
+        return (super().fingerprint(), manifest_mtime)
+
+    def _fresh_manifest(self) -> Optional[Dict[str, Any]]:
+        manifest = read_manifest(self.artifact_dir)
+        if manifest is None:
+            return None
+        if manifest.get("format") != FORMAT_VERSION or manifest.get("externalized_images") != self.externalized_images:
+            logger.warning(f"Catalog artifact {self.artifact_dir} does not match this configuration; loading the CSV")
+            return None
+        source = manifest["source"]
+        st = os.stat(self.path)
+        # the stat matching what was compiled is enough; otherwise compare contents
+        if (st.st_size, st.st_mtime_ns) != (source["size"], source["mtime_ns"]) and file_sha256(self.path) != source["sha256"]:
+            logger.warning(f"Catalog artifact {self.artifact_dir} is stale; loading the CSV (recompile with `python -m recommender.catalog_artifact compile`)")
+            return None
+        return manifest
+
+    def load(self):
+        manifest = self._fresh_manifest()
+        if manifest is not None:
+            try:
+                exercises = ArtifactExercises(os.path.join(self.artifact_dir, manifest["build"]), manifest)
+                logger.info(f"Exercise catalog mapped from artifact build {manifest['build']}")
+                return exercises, manifest["source"]["sha256"][:16]
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"Could not open catalog artifact {self.artifact_dir}: {e}; loading the CSV")
+        return super().load()
+
+
+# python -m recommender.catalog_artifact compile [--csv PATH] [--out DIR]
+if __name__ == "__main__":
+    import argparse
+    from recommender.recommender import EXERCISES_CSV, EXERCISES_ARTIFACT, ASSET_STORE, load_exercises
+
+    parser = argparse.ArgumentParser(description="Precompile the exercise catalog")
+    parser.add_argument("command", choices=["compile"])
+    parser.add_argument("--csv", default=EXERCISES_CSV)
+    parser.add_argument("--out", default=EXERCISES_ARTIFACT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    records = load_exercises(args.csv, ASSET_STORE)
+    build_dir = write_artifact(records, args.out, args.csv, externalized_images=ASSET_STORE is not None)
+    logger.info(f"Compiled {len(records)} exercises into {build_dir}")
@@ -0,0 +1,92 @@
+# recommender/exercise_record.py
+from collections.abc import Mapping
+from sys import intern
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# ---------- Compact exercise rows ----------
+# One immutable, slotted object per catalog row instead of a 17-key dict:
+#   - categorical fields (area, type, intensity, difficulty, equipment,
+#     movement plane) and tags are interned, so the thousands of rows sharing
+#     "knee" or "mobility" point at one string
+#   - tag lists are tuples, and identical tuples are shared between rows
+#   - equality and hashing are by identity, so selection bookkeeping never
+#     compares rows field by field
+# Rows still read like the dicts they replace (row["targetArea"],
+# row.get("rep"), dict(row)), so code written against load_exercises() dicts
+# keeps working; hot paths use attributes.
+
+FIELDS = (
+    "exerciseName", "exerciseType", "targetArea", "rep", "holdTime", "set",
+    "difficulty", "equipmentNeeded", "aiTrackingEnabled", "description",
+    "demoVideo", "image", "imageId", "intensity", "intended_effects",
+    "contraindications", "movement_plane", "progressions"
+)
+_INTERNED = ("exerciseType", "targetArea", "difficulty", "equipmentNeeded", "intensity", "movement_plane")
+_TAGS = ("intended_effects", "contraindications", "progressions")
+_FIELD_SET = frozenset(FIELDS)
+# load_exercises() always fills these; rows built by hand may leave them out
+_DEFAULTS = {
+    "set": 3, "difficulty": "easy", "equipmentNeeded": "none", "aiTrackingEnabled": True,
+    "description": "", "demoVideo": "", "image": "", "intensity": "low", "movement_plane": ""
+}
+
+_PLAIN = tuple(name for name in FIELDS if name not in _INTERNED and name not in _TAGS)
+
+_shared_tags: Dict[Tuple[Any, ...], Tuple[str, ...]] = {}
+
+def _tags(values) -> Tuple[str, ...]:
+    key = tuple(values) if values else ()
+    tags = _shared_tags.get(key)
+    if tags is None:
+        tags = _shared_tags[key] = tuple(intern(str(v)) for v in key)
+    return tags
+
+class ExerciseRecord(Mapping):
+    __slots__ = FIELDS + ("name_key",)
+
+    def __init__(self, **fields: Any):
+        get, set_field = fields.get, object.__setattr__
+        for name in _PLAIN:
+            set_field(self, name, get(name, _DEFAULTS.get(name)))
+        for name in _INTERNED:
+            value = get(name, _DEFAULTS.get(name))
+            set_field(self, name, intern(value) if value is not None else None)
+        for name in _TAGS:
+            set_field(self, name, _tags(get(name)))
+        # case-insensitive name, used to drop repeated exercises from a selection
+        set_field(self, "name_key", (self.exerciseName or "").lower())
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ExerciseRecord is immutable; use replace()")
+
+    def replace(self, **changes: Any) -> "ExerciseRecord":
+        return ExerciseRecord(**{**self.to_dict(), **changes})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A plain dict in the load_exercises() format (tags as lists)."""
+        return {name: list(value) if name in _TAGS else value for name, value in zip(FIELDS, map(self.__getattribute__, FIELDS))}
+
+    # Mapping interface, for code that treats rows as dicts
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        return f"ExerciseRecord({self.exerciseName!r}, {self.targetArea!r})"
+
+def as_record(row: Any) -> ExerciseRecord:
+    """The row itself if it already is an ExerciseRecord, else a record built from a load_exercises()-style dict."""
+    return row if isinstance(row, ExerciseRecord) else ExerciseRecord(**row)
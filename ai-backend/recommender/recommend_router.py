@@ -1,9 +1,16 @@
-from fastapi import APIRouter
-from models.pain_data import PainData
-from models.exercise import ExerciseResponse, InnerExercise
-from recommender.recommender import recommend_exercises
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from typing import List, Dict, Any, FrozenSet, Literal, Optional
+from pydantic import TypeAdapter
+from models.pain_data import PainSubmission
+from models.exercise import ExerciseResponse
+from recommender.recommender import recommend_exercises, recommend_exercises_batch, resolve_fields, catalog_version, ASSET_STORE
+from utils.metrics import log_event
+from utils.ingest import read_body, body_schema
 
 
+import os
+import orjson
 import logging
 
 
@@ -15,33 +22,165 @@ logger = logging.getLogger("recommeder")
 
 router = APIRouter(prefix="/ai", tags=["Exercise Recommendation"])
 
-@router.post("/recommend", response_model=ExerciseResponse)
-async def recommend_exercise(data: PainData):
+# -----------------------------
+# Image rendering
+# -----------------------------
+# inline: base64 data URI (legacy payload), url: link to /ai/assets/{imageId}
+# for externalized images, none: omit images entirely.
+ImageMode = Literal["inline", "url", "none"]
+DEFAULT_IMAGE_MODE = os.getenv("RECOMMEND_IMAGE_MODE", "inline")
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL", "/ai/assets")
+
+def render_image(ex: Dict[str, Any], image_mode: str) -> Optional[str]:
+    image_id = ex.get("imageId")
+    if image_mode == "none":
+        return None
+    if not image_id or ASSET_STORE is None:
+        return ex.get("image", "")
+    if image_mode == "url":
+        return f"{ASSET_BASE_URL}/{image_id}"
+    return ASSET_STORE.data_uri(image_id) or ""
+
+# Responses are built as plain dicts straight from the recommender's results
+# and serialized with orjson; InnerExercise/ExerciseResponse document the
+# default shape but are not run over every item.
+INNER_EXERCISE_FIELDS = frozenset({
+    "exerciseName", "exerciseType", "targetArea", "difficulty", "equipmentNeeded",
+    "aiTrackingEnabled", "description", "demoVideo", "image", "imageId"
+})
+
+def to_inner_exercises(exercises: List[Dict[str, Any]], image_mode: str = DEFAULT_IMAGE_MODE) -> List[Dict[str, Any]]:
+    """Recommendations in the InnerExercise shape (what model_dump(mode="json") would give)."""
+    return [
+        {
+            "exerciseName": ex["exerciseName"],
+            "exerciseType": ex["exerciseType"],
+            "rep": ex.get("rep"),
+            "holdTime": ex.get("holdTime"),
+            "set": ex.get("set", 3),
+            "completedSets": 0,
+            "targetArea": ex.get("targetArea"),
+            "difficulty": ex.get("difficulty", "easy"),
+            "equipmentNeeded": ex.get("equipmentNeeded", "None"),
+            "aiTrackingEnabled": ex.get("aiTrackingEnabled", True),
+            "description": ex.get("description", ""),
+            "demoVideo": ex.get("demoVideo", ""),
+            "image": render_image(ex, image_mode)
+        }
+        for ex in exercises
+    ]
+
+def to_projection(exercises: List[Dict[str, Any]], fields: FrozenSet[str], image_mode: str) -> List[Dict[str, Any]]:
+    """Recommendations holding exactly `fields`, images rendered per image_mode."""
+    if "image" not in fields:
+        return exercises
+    keep_image_id = "imageId" in fields
+    projected = []
+    for ex in exercises:
+        item = dict(ex, image=render_image(ex, image_mode))
+        if not keep_image_id:
+            del item["imageId"]
+        projected.append(item)
+    return projected
+
+def _requested_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    try:
+        return resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _recommendation_fields(projection: Optional[FrozenSet[str]]) -> FrozenSet[str]:
+    # rendering an image needs its asset id
+    if projection is None:
+        return INNER_EXERCISE_FIELDS
+    return projection | {"imageId"} if "image" in projection else projection
+
+def _render(exercises: List[Dict[str, Any]], projection: Optional[FrozenSet[str]], image_mode: str) -> List[Dict[str, Any]]:
+    if projection is None:
+        return to_inner_exercises(exercises, image_mode)
+    return to_projection(exercises, projection, image_mode)
+
+FIELDS_QUERY = Query(
+    None,
+    description="Projection: names, dosage, explain, or comma-separated result fields. "
+                "Omitted: the InnerExercise shape."
+)
+
+# Bodies are read through utils.ingest, which drops the doctorSlip the Node
+# backend forwards with the pain document before anything is parsed.
+SUBMISSION = TypeAdapter(PainSubmission)
+SUBMISSION_BATCH = TypeAdapter(List[PainSubmission])
+
+@router.post("/recommend", response_model=ExerciseResponse, openapi_extra=body_schema(SUBMISSION))
+async def recommend_exercise(
+    request: Request,
+    imageMode: ImageMode = Query(DEFAULT_IMAGE_MODE),
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """
+    Recommended exercises for one pain submission. With `fields`, each exercise
+    carries only the requested fields (e.g. fields=dosage: names and dosages),
+    and the stages computing unrequested ones are skipped.
+    """
+    projection = _requested_fields(fields)
+    data = await read_body(request, SUBMISSION)
     exercises = recommend_exercises(
         injury_place=data.injuryPlace,
         pain_level=data.painLevel,
-        pain_type=data.painType
+        pain_type=data.painType,
+        copy=False,
+        fields=_recommendation_fields(projection)
     )
 
-    generated_exercises = [
-        InnerExercise(
-            exerciseName=ex["exerciseName"],
-            exerciseType=ex["exerciseType"],
-            rep=ex.get("rep"),
-            holdTime=ex.get("holdTime"),
-            set=ex.get("set", 3),
-            completedSets=0,
-            targetArea=ex.get("targetArea"),
-            difficulty=ex.get("difficulty", "easy"),
-            equipmentNeeded=ex.get("equipmentNeeded", "None"),
-            aiTrackingEnabled=ex.get("aiTrackingEnabled", True),
-            description=ex.get("description", ""),
-            demoVideo=ex.get("demoVideo", ""),
-            image=ex.get("image", "")
-        )
-        for ex in exercises
-    ]
-    for ex in generated_exercises:
-        logger.info(f"Exercise video link: {ex.demoVideo}")
+    log_event(logger, "recommend", injuryPlace=data.injuryPlace, painLevel=data.painLevel, exercises=len(exercises))
+    return ORJSONResponse(
+        {"exercises": _render(exercises, projection, imageMode), "progress": 0.0},
+        headers={"X-Catalog-Version": catalog_version()}
+    )
+
+@router.post("/recommend/batch", openapi_extra=body_schema(SUBMISSION_BATCH))
+async def recommend_exercise_batch(
+    request: Request,
+    imageMode: ImageMode = Query(DEFAULT_IMAGE_MODE),
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """
+    Streams one NDJSON line per input item, in input order:
+    {"index": i, "userId": ..., "exercises": [...], "progress": 0.0}
+    Items with the same injury place, pain type and pain-level band are scored
+    and serialized once.
+    """
+    projection = _requested_fields(fields)
+    data = await read_body(request, SUBMISSION_BATCH)
+
+    def ndjson_lines():
+        serialized: Dict[Any, bytes] = {}
+        for index, key, exercises in recommend_exercises_batch(data, fields=_recommendation_fields(projection)):
+            exercises_json = serialized.get(key)
+            if exercises_json is None:
+                exercises_json = orjson.dumps(_render(exercises, projection, imageMode))
+                serialized[key] = exercises_json
+            yield (
+                b'{"index": ' + str(index).encode() + b', "userId": ' + orjson.dumps(data[index].userId)
+                + b', "exercises": ' + exercises_json + b', "progress": 0.0}\n'
+            )
+
+    log_event(logger, "recommend_batch", items=len(data))
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Catalog-Version": catalog_version()}
+    )
+
+@router.get("/assets/{asset_id}")
+async def get_asset(asset_id: str, request: Request):
+    """Serves externalized exercise images; ids are content hashes, so responses are immutable."""
+    mapped = ASSET_STORE.open(asset_id) if ASSET_STORE is not None else None
+    if mapped is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
 
-    return ExerciseResponse(exercises=generated_exercises, progress=0)
+    etag = f'"{asset_id.split(".")[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=mapped[:], media_type=ASSET_STORE.content_type(asset_id), headers=headers)
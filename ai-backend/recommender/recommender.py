@@ -1,8 +1,22 @@
 # recommender.py
 import csv
+import os
 import random
-from typing import List, Dict, Optional, Any
+import logging
+from typing import List, Dict, Optional, Any, Callable, FrozenSet, Iterable, Iterator, Tuple
 from math import ceil
+import numpy as np
+from recommender.catalog import CompiledCatalog, CatalogManager
+from recommender.selection import select_diverse, SCORE_FLOOR
+from recommender.scoring_model import LinearScoringModel, feature_matrix, load_scoring_model, probability, share_floor
+from recommender.catalog_artifact import ArtifactCatalogSource
+from recommender.exercise_record import ExerciseRecord
+from recommender.asset_store import AssetStore
+from utils.cache import LRUCache
+from utils.registry import registry
+from utils.metrics import metrics, stage_timer, cache_family
+
+logger = logging.getLogger("recommender")
 
 # ---------- Configuration: tune these weights to match clinician preferences ----------
 WEIGHTS = {
@@ -53,44 +67,113 @@ def safe_int(value):
 
 
 
-def load_exercises(csv_file: str = "exercises.csv") -> List[Dict[str, Any]]:
+def load_exercises(csv_file: str = "exercises.csv", asset_store: Optional[AssetStore] = None) -> List[ExerciseRecord]:
+    """
+    Parses the exercise CSV into immutable ExerciseRecord rows. With an
+    asset_store, inline base64 images are moved into the store and the row
+    keeps only "imageId" (and an empty "image").
+    """
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        return parse_exercises(f, asset_store)
+
+def parse_exercises(lines: Iterable[str], asset_store: Optional[AssetStore] = None) -> List[ExerciseRecord]:
+    """load_exercises() on CSV text that was already read."""
     exercises = []
     seen = set()  # to track unique exercise names
-    with open(csv_file, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row.get("exerciseName", "").strip()
-            if not name or name.lower() in seen:
-                continue  # skip duplicates or empty names
-            seen.add(name.lower())
-
-            intended_effects = [s.strip().lower() for s in (row.get("intended_effects") or "").split("|") if s.strip()]
-            contraindications = [s.strip().lower() for s in (row.get("contraindications") or "").split("|") if s.strip()]
-            progressions = [s.strip() for s in (row.get("progressions") or "").split("|") if s.strip()]
-            ex = {
-                "exerciseName": name,
-                "exerciseType": row.get("exerciseType", "").strip().lower(),
-                "targetArea": row.get("targetArea", "").strip().lower(),
-                "rep": safe_int(row.get("rep")),
-                "holdTime": safe_int(row.get("holdTime")),
-                "set": int(row["set"]) if row.get("set") else 3,
-                "difficulty": row.get("difficulty", "easy").strip().lower(),
-                "equipmentNeeded": row.get("equipmentNeeded", "none").strip().lower(),
-                "aiTrackingEnabled": (row.get("aiTrackingEnabled", "True").strip().lower() == "true"),
-                "description": row.get("description", ""),
-                "demoVideo": row.get("demoVideo", ""),
-                "image": row.get("image", ""),
-                "intensity": row.get("intensity", "low").strip().lower(),
-                "intended_effects": intended_effects,
-                "contraindications": contraindications,
-                "movement_plane": row.get("movement_plane", "").strip().lower(),
-                "progressions": progressions
-            }
-            exercises.append(ex)
+    reader = csv.DictReader(lines)
+    for row in reader:
+        name = row.get("exerciseName", "").strip()
+        if not name or name.lower() in seen:
+            continue  # skip duplicates or empty names
+        seen.add(name.lower())
+
+        intended_effects = [s.strip().lower() for s in (row.get("intended_effects") or "").split("|") if s.strip()]
+        contraindications = [s.strip().lower() for s in (row.get("contraindications") or "").split("|") if s.strip()]
+        progressions = [s.strip() for s in (row.get("progressions") or "").split("|") if s.strip()]
+        image = row.get("image", "")
+        image_id = asset_store.put_data_uri(image) if asset_store is not None else None
+        ex = ExerciseRecord(
+            exerciseName=name,
+            exerciseType=row.get("exerciseType", "").strip().lower(),
+            targetArea=row.get("targetArea", "").strip().lower(),
+            rep=safe_int(row.get("rep")),
+            holdTime=safe_int(row.get("holdTime")),
+            set=int(row["set"]) if row.get("set") else 3,
+            difficulty=row.get("difficulty", "easy").strip().lower(),
+            equipmentNeeded=row.get("equipmentNeeded", "none").strip().lower(),
+            aiTrackingEnabled=(row.get("aiTrackingEnabled", "True").strip().lower() == "true"),
+            description=row.get("description", ""),
+            demoVideo=row.get("demoVideo", ""),
+            image="" if image_id else image,
+            imageId=image_id,
+            intensity=row.get("intensity", "low").strip().lower(),
+            intended_effects=intended_effects,
+            contraindications=contraindications,
+            movement_plane=row.get("movement_plane", "").strip().lower(),
+            progressions=progressions
+        )
+        exercises.append(ex)
     return exercises
 
 
-EXERCISES_DB = load_exercises()
+# ---------- Live catalog ----------
+# The catalog manager parses and compiles the CSV, swaps new versions in
+# atomically and (when CATALOG_POLL_INTERVAL > 0 and watching is started)
+# reloads it in the background when the file changes. EXERCISES_DB always
+# mirrors the live version; assigning a new list to it publishes that list.
+# When EXERCISES_ARTIFACT holds an up-to-date precompiled catalog
+# (python -m recommender.catalog_artifact compile), it is memory-mapped
+# instead of parsing the CSV.
+EXERCISES_CSV = os.getenv(
+    "EXERCISES_CSV",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exercises.csv")
+)
+# When EXERCISE_ASSET_DIR is set, inline base64 images are externalized into a
+# content-addressed store at load time and served from /ai/assets/{imageId}.
+ASSET_STORE = AssetStore(os.environ["EXERCISE_ASSET_DIR"]) if os.getenv("EXERCISE_ASSET_DIR") else None
+EXERCISES_ARTIFACT = os.getenv("EXERCISES_ARTIFACT", os.path.splitext(EXERCISES_CSV)[0] + ".catalog")
+
+catalog_manager = CatalogManager(
+    ArtifactCatalogSource(
+        EXERCISES_CSV, lambda lines: parse_exercises(lines, ASSET_STORE),
+        EXERCISES_ARTIFACT, externalized_images=ASSET_STORE is not None
+    ),
+    poll_interval=float(os.getenv("CATALOG_POLL_INTERVAL", "10"))
+)
+
+def _sync_exercises_db(catalog: CompiledCatalog) -> None:
+    global EXERCISES_DB
+    EXERCISES_DB = catalog.exercises
+
+catalog_manager.add_listener(_sync_exercises_db)
+def _load_catalog() -> CompiledCatalog:
+    if "EXERCISES_DB" in globals():
+        # assigned by hand before the first load
+        return catalog_manager.adopt(lambda: EXERCISES_DB)
+    return catalog_manager.current
+
+# the CSV is parsed on first use (or preloaded), not at import
+registry.register("exercise_catalog", _load_catalog)
+
+def __getattr__(name: str) -> Any:
+    # EXERCISES_DB only exists once the catalog is loaded; reading it from
+    # outside the module loads it
+    if name == "EXERCISES_DB":
+        registry.get("exercise_catalog")
+        return globals()["EXERCISES_DB"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _current_catalog() -> CompiledCatalog:
+    registry.get("exercise_catalog")  # first load only; afterwards a dict lookup
+    catalog = catalog_manager.current
+    if catalog.exercises is not EXERCISES_DB or catalog.size != len(EXERCISES_DB):
+        # EXERCISES_DB was replaced or resized by hand: compile and publish it
+        catalog = catalog_manager.adopt(lambda: EXERCISES_DB)
+    return catalog
+
+def catalog_version() -> str:
+    """ETag of the live catalog; changes whenever a new version is swapped in."""
+    return catalog_manager.current.etag
 
 # ---------- Utility scoring helpers ----------
 def _target_match_score(ex: Dict, injury_place: str) -> float:
@@ -149,6 +232,163 @@ def _intensity_match_bonus(ex: Dict, pain_level: int) -> float:
         return 1.0
     return 0.0
 
+# ---------- Vectorized scoring (same signals as the helpers above) ----------
+def _candidate_signals(
+    catalog: CompiledCatalog,
+    rows: np.ndarray,
+    injury_place: str,
+    pain_level: int,
+    pain_type: str,
+    available_equipment: List[str]
+) -> Dict[str, np.ndarray]:
+    """Per-row values of each scoring helper for the given catalog rows."""
+    n = len(rows)
+    prefs = PAIN_TYPE_PREFERENCES.get(pain_type, {})
+    prefer = catalog.has_any_effect(rows, prefs.get("prefer_effects", []))
+    avoid = catalog.has_any_effect(rows, prefs.get("avoid_effects", []))
+
+    if pain_level >= 8:
+        suitability = catalog.intensity_in(rows, ("low",)).astype(float)
+    elif pain_level >= 5:
+        suitability = catalog.intensity_in(rows, ("low", "medium")).astype(float)
+    else:
+        suitability = np.ones(n)
+
+    red_flags = set(CONTRAINDICATION_TAGS.get("red_flags", []))
+    penalty = np.where(catalog.has_any_contra(rows, lambda c: c in red_flags), 2.0, 0.0)
+    penalty += np.where(catalog.has_any_contra(rows, lambda c: pain_type in c or injury_place in c), 1.0, 0.0)
+
+    available = {e.lower() for e in (available_equipment or [])}
+    equipment = catalog.equipment_where(
+        rows, lambda needed: needed in ("none", "", "bodyweight") or needed in available
+    ).astype(float)
+
+    if pain_level >= 7:
+        intensity = catalog.intensity_in(rows, ("low",)).astype(float)
+    elif 4 <= pain_level <= 6:
+        intensity = np.where(catalog.intensity_in(rows, ("low", "medium")), 0.8, 0.0)
+    else:
+        intensity = np.ones(n)
+
+    return {
+        "target_match": catalog.area_is(rows, injury_place).astype(float),
+        "pain_type_compat": (prefer & ~avoid).astype(float),
+        "pain_level_suitability": suitability,
+        "contraindication_penalty": penalty,
+        "equipment_match": equipment,
+        "intensity_match": intensity,
+        "progression_bonus": catalog.has_progressions[rows],
+    }
+
+def _composite_scores(signals: Dict[str, np.ndarray]) -> np.ndarray:
+    # accumulate in the same order as the per-exercise formula so scores (and ties) match exactly
+    score = np.zeros(len(signals["target_match"]))
+    score += WEIGHTS["target_match"] * signals["target_match"]
+    score += WEIGHTS["pain_type_compat"] * signals["pain_type_compat"]
+    score += WEIGHTS["pain_level_suitability"] * signals["pain_level_suitability"]
+    score -= WEIGHTS["contraindication_penalty"] * signals["contraindication_penalty"]
+    score += WEIGHTS["equipment_match"] * signals["equipment_match"]
+    score += WEIGHTS["intensity_match"] * signals["intensity_match"]
+    score[signals["progression_bonus"]] += WEIGHTS["progression_bonus"]
+    return score
+
+# ---------- Learned scoring model ----------
+# RECOMMEND_MODEL: a model trained with `python -m recommender.training fit`.
+# When it loads, it replaces the hand WEIGHTS in ranking (one dot product over
+# the same signals); when unset or unusable, WEIGHTS are used as before.
+RECOMMEND_MODEL = os.getenv("RECOMMEND_MODEL", "")
+
+def _load_scoring_model() -> Optional[LinearScoringModel]:
+    if not RECOMMEND_MODEL:
+        return None
+    try:
+        model = load_scoring_model(RECOMMEND_MODEL)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load scoring model {RECOMMEND_MODEL}: {e}; using hand weights")
+        return None
+    logger.info(f"Scoring with learned model {RECOMMEND_MODEL}: {model}")
+    return model
+
+registry.register("scoring_model", _load_scoring_model)
+
+def _scores(
+    signals: Dict[str, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[Callable[[float], float]]]:
+    """
+    (scores, keep, shown, floor_of): the scores candidates are ranked on, the
+    candidates that pass the contraindication filter, the scores reported as
+    raw_score/confidence, and the selection floor for the top score (None:
+    SCORE_FLOOR x the top score).
+    """
+    composite = _composite_scores(signals)
+    keep = composite > -1.0  # keep borderline items; tune threshold as needed
+    model = registry.get("scoring_model")
+    if model is None:
+        return composite, keep, composite, None
+    # Eligibility stays the hand-weight cutoff above: a learned model reorders
+    # the candidates the clinical rules allow, it never widens or narrows them.
+    # It ranks on logits (probabilities tie once the sigmoid saturates) and
+    # reports probabilities; the floor is SCORE_FLOOR x the top probability.
+    logits = model.logits(feature_matrix(signals))
+    return logits, keep, probability(logits), lambda top: share_floor(top, SCORE_FLOOR)
+
+# ---------- Result cache ----------
+# recommend_exercises is deterministic for its normalized inputs, so results are
+# memoized. The cache is cleared whenever EXERCISES_DB (via the compiled catalog)
+# or WEIGHTS change; call RESULT_CACHE.invalidate() after editing the other
+# clinical mappings at runtime.
+RESULT_CACHE = LRUCache(
+    maxsize=int(os.getenv("RECOMMEND_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("RECOMMEND_CACHE_TTL", "3600")) or None
+)
+
+def _copy_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    # cached results are shared; hand callers their own mutable containers
+    copy = dict(item)
+    if "dosage" in copy:
+        copy["dosage"] = dict(item["dosage"])
+    for key in ("intended_effects", "progressions", "rationale"):
+        if isinstance(copy.get(key), list):
+            copy[key] = list(copy[key])
+    return copy
+
+metrics.add_collector(lambda: [cache_family("recommendations", RESULT_CACHE.info())])
+
+# ---------- Result projections ----------
+# Every field a recommendation can carry, in output order. Callers that need
+# only some of them pass `fields` and get result dicts holding just those
+# keys. Cached results are computed with every field, once per key, and
+# projected after the lookup, so one entry (and the warm-up) serves every
+# projection; uncached calls skip the stages producing unrequested fields
+# (dosage, confidence, rationale, raw_score). Named projections cover the
+# common cases.
+RESULT_FIELDS = (
+    "exerciseName", "exerciseType", "dosage", "targetArea", "difficulty", "equipmentNeeded",
+    "aiTrackingEnabled", "description", "demoVideo", "image", "imageId",
+    "intended_effects", "progressions", "raw_score", "confidence", "rationale"
+)
+PROJECTIONS: Dict[str, Tuple[str, ...]] = {
+    "names": ("exerciseName",),
+    "dosage": ("exerciseName", "exerciseType", "dosage"),
+    "explain": RESULT_FIELDS,
+}
+
+def resolve_fields(spec: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    A projection name ("names", "dosage", "explain") or comma-separated result
+    fields -> the field set for recommend_exercises(); None/"" means every
+    field. Raises ValueError on unknown names.
+    """
+    if not spec:
+        return None
+    if spec in PROJECTIONS:
+        return frozenset(PROJECTIONS[spec])
+    fields = frozenset(f.strip() for f in spec.split(",") if f.strip())
+    unknown = sorted(fields.difference(RESULT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; use {sorted(PROJECTIONS)} or fields from {list(RESULT_FIELDS)}")
+    return fields
+
 # ---------- Main recommendation function ----------
 def recommend_exercises(
     injury_place: str,
@@ -157,13 +397,77 @@ def recommend_exercises(
     patient_history: Optional[Dict[str, Any]] = None,
     available_equipment: Optional[List[str]] = None,
     desired_count: Optional[int] = None,
-    random_seed: Optional[int] = None
+    random_seed: Optional[int] = None,
+    copy: bool = True,
+    fields: Optional[Iterable[str]] = None
 ) -> List[Dict[str, Any]]:
     """
     Returns a list of recommended exercises with rationale and a confidence score.
     patient_history: optional dict e.g. {"previous_exercises": [...], "tolerated": {"exerciseName": True/False}, "days_since_injury": 10}
+    Results are served from RESULT_CACHE unless a random_seed or patient_history is given.
+    copy=False returns the cached result objects themselves, for callers that
+    only read them (the routers serialize them as they are).
+    fields: the result fields to return (see RESULT_FIELDS / resolve_fields());
+    default all. Selection and order do not depend on it, and cache entries
+    hold every field.
     """
-
+    catalog = _current_catalog()
+    fields = frozenset(fields) if fields is not None else None
+    if random_seed is not None or patient_history:
+        return _recommend_exercises_uncached(
+            catalog, injury_place, pain_level, pain_type,
+            patient_history, available_equipment, desired_count, random_seed, fields
+        )
+
+    generation = (catalog, tuple(WEIGHTS.items()), registry.get("scoring_model"))
+    key = (
+        injury_place.lower(),
+        pain_type.lower(),
+        pain_level_band(pain_level),
+        tuple(sorted({e.lower() for e in (available_equipment or [])})),
+        desired_count
+    )
+    results = _project(RESULT_CACHE.get_or_compute(
+        key,
+        lambda: _recommend_exercises_uncached(
+            catalog, injury_place, pain_level, pain_type,
+            None, available_equipment, desired_count, None
+        ),
+        generation
+    ), fields)
+    return [_copy_result(item) for item in results] if copy else results
+
+def _project(results: List[Dict[str, Any]], fields: Optional[FrozenSet[str]]) -> List[Dict[str, Any]]:
+    # full cached results -> the requested fields, in RESULT_FIELDS order
+    if fields is None:
+        return results
+    wanted = [name for name in RESULT_FIELDS if name in fields]
+    return [{name: item[name] for name in wanted} for item in results]
+
+def warm_recommendation_cache() -> int:
+    """Precompute every (area, pain type, pain-level band) combination; returns the number of entries."""
+    catalog = _current_catalog()
+    band_levels = [1, 4, 5, 7, 8]  # one representative per pain_level_band
+    count = 0
+    for area in catalog.area_index:
+        for pain_type in PAIN_TYPE_PREFERENCES:
+            for level in band_levels:
+                recommend_exercises(injury_place=area, pain_level=level, pain_type=pain_type)
+                count += 1
+    return count
+
+@stage_timer("recommend_scoring")
+def _recommend_exercises_uncached(
+    catalog: CompiledCatalog,
+    injury_place: str,
+    pain_level: int,
+    pain_type: str,
+    patient_history: Optional[Dict[str, Any]] = None,
+    available_equipment: Optional[List[str]] = None,
+    desired_count: Optional[int] = None,
+    random_seed: Optional[int] = None,
+    fields: Optional[FrozenSet[str]] = None
+) -> List[Dict[str, Any]]:
     if random_seed is not None:
         random.seed(random_seed)
 
@@ -173,8 +477,8 @@ def recommend_exercises(
     patient_history = patient_history or {}
 
     # 1) shortlist by targetArea (primary) then fallback to related areas
-    candidates = [ex for ex in EXERCISES_DB if ex["targetArea"] == injury_place]
-    if not candidates:
+    rows = catalog.rows_for_areas([injury_place])
+    if not len(rows):
         # fallback mapping — common related areas; extend as needed
         RELATED = {
             "wrist": ["forearm", "hand"],
@@ -184,35 +488,16 @@ def recommend_exercises(
             "hip": ["knee", "lumbar"]
         }
         fallback_areas = RELATED.get(injury_place, ["shoulder", "knee", "spine/core"])
-        candidates = [ex for ex in EXERCISES_DB if ex["targetArea"] in fallback_areas]
-
-    # 2) compute a composite score per exercise
-    scored = []
-    for ex in candidates:
-        score = 0.0
-        score += WEIGHTS["target_match"] * _target_match_score(ex, injury_place)
-        score += WEIGHTS["pain_type_compat"] * _pain_type_compat_score(ex, pain_type)
-        score += WEIGHTS["pain_level_suitability"] * _pain_level_suitability_score(ex, pain_level)
-        # subtract contraindication penalties
-        score -= WEIGHTS["contraindication_penalty"] * _contraindication_penalty(ex, pain_type, injury_place)
-        # equipment & intensity
-        score += WEIGHTS["equipment_match"] * _equipment_match_score(ex, available_equipment)
-        score += WEIGHTS["intensity_match"] * _intensity_match_bonus(ex, pain_level)
-        # small bonus for having a progression
-        if ex.get("progressions"):
-            score += WEIGHTS["progression_bonus"]
-
-        # small diversity bonus to encourage mixing types
-        # (we will apply diversity at selection time by preferring type-mixed lists)
-        scored.append({"exercise": ex, "raw_score": score})
+        rows = catalog.rows_for_areas(fallback_areas)
 
-    # 3) filter out strongly contraindicated exercises (negative net or large penalty)
-    filtered = [s for s in scored if s["raw_score"] > -1.0]  # keep borderline items; tune threshold as needed
+    # 2) compute a composite score per exercise (vectorized over the shortlist)
+    signals = _candidate_signals(catalog, rows, injury_place, pain_level, pain_type, available_equipment)
 
-    # 4) sort by raw_score descending
-    filtered.sort(key=lambda x: x["raw_score"], reverse=True)
+    # 3) filter out strongly contraindicated exercises (negative net or large penalty)
+    scores, keep, shown, floor_of = _scores(signals)
+    kept = np.flatnonzero(keep)
 
-    # 5) determine desired_count based on pain level if not provided
+    # 4) determine desired_count based on pain level if not provided
     if desired_count is None:
         if pain_level <= 3:
             desired_count = 4
@@ -221,154 +506,166 @@ def recommend_exercises(
         else:
             desired_count = 3  # fewer exercises but safer for severe pain
 
-    # 6) select exercises, ensuring diversity (mix of hold/repetition and different effects)
-    selected = []
-    types_seen = set()
-    effects_seen = set()
-    for item in filtered:
-        ex = item["exercise"]
-        # try to keep variety: prefer adding different type than already present
-        if len(selected) >= desired_count:
-            break
-        if len(selected) == 0:
-            selected.append(item)
-            types_seen.add(ex["exerciseType"])
-            effects_seen.update(ex.get("intended_effects", []))
-            continue
-
-        # if candidate adds diversity, prefer it; otherwise still can add if good score
-        adds_diversity = ex["exerciseType"] not in types_seen or not (set(ex.get("intended_effects", [])) & effects_seen)
-        if adds_diversity:
-            selected.append(item)
-            types_seen.add(ex["exerciseType"])
-            effects_seen.update(ex.get("intended_effects", []))
-        else:
-            # allow similar items if we still need count and score remains high
-            if len(selected) < desired_count and item["raw_score"] >= (filtered[0]["raw_score"] * 0.35):
-                selected.append(item)
-
-    # if we couldn't reach desired_count, fill with the top remaining
-    idx = 0
-    while len(selected) < desired_count and idx < len(filtered):
-        candidate = filtered[idx]
-        if candidate not in selected:
-            selected.append(candidate)
-        idx += 1
-
-    # remove duplicate exercise names before final output
-    unique_selected = []
-    seen_names = set()
-    for item in selected:
-        ex_name = item["exercise"]["exerciseName"].lower()
-        if ex_name not in seen_names:
-            seen_names.add(ex_name)
-            unique_selected.append(item)
-    selected = unique_selected
-
-
-    # 7) build output with dosages, rationale, and a confidence estimate
-    results = []
-    max_score = max((s["raw_score"] for s in filtered), default=1.0)
-    min_score = min((s["raw_score"] for s in filtered), default=0.0)
-    score_range = max_score - min_score if max_score != min_score else 1.0
-
-    for s in selected:
-        ex = s["exercise"].copy()
-        raw = s["raw_score"]
-        # normalized score 0..1
-        normalized = (raw - min_score) / score_range
-
-        # build sets/reps/hold based on exerciseType & pain_level
-        if ex["exerciseType"] == "repetition":
-            # reduce reps for high pain levels
-            base_rep = ex.get("rep") or 8
-            if pain_level >= 8:
-                rep = max(4, int(base_rep * 0.5))
-                sets = max(1, int(ex.get("set", 3)))
-            elif pain_level >= 5:
-                rep = max(6, int(base_rep * 0.75))
-                sets = int(ex.get("set", 3))
-            else:
-                rep = base_rep
-                sets = int(ex.get("set", 3))
-            dosage = {"sets": sets, "reps": rep}
-        else:  # hold
-            base_hold = ex.get("holdTime") or 5
-            if pain_level >= 8:
-                hold = max(3, int(base_hold * 0.6))
-                sets = max(1, int(ex.get("set", 3)))
-            elif pain_level >= 5:
-                hold = max(4, int(base_hold * 0.8))
-                sets = int(ex.get("set", 3))
-            else:
-                hold = base_hold
-                sets = int(ex.get("set", 3))
-            dosage = {"sets": sets, "hold_seconds": hold}
-
-        # confidence: combination of normalized score and dataset coverage factors
+    # 5) select by raw_score descending, ensuring diversity (mix of hold/repetition
+    # and different effects); candidates are ranked lazily, see selection.py
+    records = catalog.records
+    selected = [
+        {"pos": pos, "exercise": ex, "raw_score": float(shown[pos])}
+        for pos, _, ex in select_diverse(scores, kept, lambda pos: records[rows[pos]], desired_count, floor_of=floor_of)
+    ]
+
+    # 6) Final ordering — place lower-impact, neuromotor, activation exercises first (idea: warm-up -> activation -> strength -> mobility)
+    selected.sort(key=lambda item: _ordering_key(item["exercise"]))
+
+    # 7) build output with dosages, rationale, and a confidence estimate;
+    # each stage runs only if its field was requested
+    wanted = RESULT_FIELDS if fields is None else [name for name in RESULT_FIELDS if name in fields]
+    if "confidence" in wanted:
+        max_score = float(shown[kept].max()) if len(kept) else 1.0
+        min_score = float(shown[kept].min()) if len(kept) else 0.0
+        score_range = max_score - min_score if max_score != min_score else 1.0
         # If normalized is high and there are many similar target-area entries, boost confidence.
-        same_area_count = sum(1 for e in EXERCISES_DB if e["targetArea"] == injury_place)
+        same_area_count = catalog.area_counts.get(injury_place, 0)
         dataset_factor = min(1.0, 0.5 + (same_area_count / 20.0))  # more samples -> slightly higher confidence
-        confidence = round(0.7 * normalized + 0.3 * dataset_factor, 3)  # tune these multipliers to reach ~0.75 target
-
-        # rationale
-        rationale_parts = []
-        if _target_match_score(ex, injury_place):
-            rationale_parts.append("Targets reported injury area")
-        ptc = _pain_type_compat_score(ex, pain_type)
-        if ptc > 0:
-            rationale_parts.append(f"Matches pain-type preferences ({pain_type})")
-        elif ptc < 0:
-            rationale_parts.append(f"Some effects not ideal for pain-type ({pain_type})")
-        if ex.get("progressions"):
-            rationale_parts.append("Has clear progression(s)")
-        if ex.get("intended_effects"):
-            rationale_parts.append("Intended effects: " + ",".join(ex.get("intended_effects")))
-        if ex.get("contraindications"):
-            rationale_parts.append("Contraindications: " + ",".join(ex.get("contraindications")))
 
+    results = []
+    for s in selected:
+        ex = s["exercise"]  # immutable record, read in place
+        computed: Dict[str, Any] = {}
+        if "dosage" in wanted:
+            computed["dosage"] = _dosage(ex, pain_level)
+        if "raw_score" in wanted:
+            computed["raw_score"] = round(s["raw_score"], 3)
+        if "confidence" in wanted:
+            # combination of normalized score (0..1) and dataset coverage factors
+            normalized = (s["raw_score"] - min_score) / score_range
+            computed["confidence"] = round(0.7 * normalized + 0.3 * dataset_factor, 3)  # tune these multipliers to reach ~0.75 target
+        if "rationale" in wanted:
+            computed["rationale"] = _rationale(ex, signals, s["pos"], pain_type)
         results.append({
-            "exerciseName": ex["exerciseName"],
-            "exerciseType": ex["exerciseType"],
-            "dosage": dosage,
-            "targetArea": ex["targetArea"],
-            "difficulty": ex.get("difficulty"),
-            "equipmentNeeded": ex.get("equipmentNeeded"),
-            "aiTrackingEnabled": ex.get("aiTrackingEnabled"),
-            "description": ex.get("description"),
-            "demoVideo": ex.get("demoVideo"),
-            "image": ex.get("image"),
-            "intended_effects": ex.get("intended_effects"),
-            "progressions": ex.get("progressions"),
-            "raw_score": round(raw, 3),
-            "confidence": confidence,
-            "rationale": rationale_parts
+            name: computed[name] if name in computed else list(getattr(ex, name)) if name in _LIST_FIELDS else getattr(ex, name)
+            for name in wanted
         })
+    return results
 
-    # 8) Final ordering — place lower-impact, neuromotor, activation exercises first (idea: warm-up -> activation -> strength -> mobility)
-    def ordering_key(item):
-        effects = item.get("intended_effects") or []
-        if "motor_control" in effects or "activation" in effects or "neural_gliding" in effects:
-            return 0
-        if "mobility" in effects or "end_range_mobility" in effects:
-            return 1
-        if "low_load_strength" in effects or "graded_exposure" in effects:
-            return 2
+_LIST_FIELDS = frozenset({"intended_effects", "progressions"})
+
+def _ordering_key(ex: ExerciseRecord) -> int:
+    effects = ex.intended_effects
+    if "motor_control" in effects or "activation" in effects or "neural_gliding" in effects:
+        return 0
+    if "mobility" in effects or "end_range_mobility" in effects:
+        return 1
+    if "low_load_strength" in effects or "graded_exposure" in effects:
+        return 2
+    return 3
+
+def _dosage(ex: ExerciseRecord, pain_level: int) -> Dict[str, int]:
+    # build sets/reps/hold based on exerciseType & pain_level
+    if ex.exerciseType == "repetition":
+        # reduce reps for high pain levels
+        base_rep = ex.rep or 8
+        if pain_level >= 8:
+            rep = max(4, int(base_rep * 0.5))
+            sets = max(1, int(ex.set))
+        elif pain_level >= 5:
+            rep = max(6, int(base_rep * 0.75))
+            sets = int(ex.set)
+        else:
+            rep = base_rep
+            sets = int(ex.set)
+        return {"sets": sets, "reps": rep}
+    # hold
+    base_hold = ex.holdTime or 5
+    if pain_level >= 8:
+        hold = max(3, int(base_hold * 0.6))
+        sets = max(1, int(ex.set))
+    elif pain_level >= 5:
+        hold = max(4, int(base_hold * 0.8))
+        sets = int(ex.set)
+    else:
+        hold = base_hold
+        sets = int(ex.set)
+    return {"sets": sets, "hold_seconds": hold}
+
+def _rationale(ex: ExerciseRecord, signals: Dict[str, np.ndarray], pos: int, pain_type: str) -> List[str]:
+    rationale_parts = []
+    if signals["target_match"][pos]:
+        rationale_parts.append("Targets reported injury area")
+    ptc = signals["pain_type_compat"][pos]
+    if ptc > 0:
+        rationale_parts.append(f"Matches pain-type preferences ({pain_type})")
+    elif ptc < 0:
+        rationale_parts.append(f"Some effects not ideal for pain-type ({pain_type})")
+    if ex.progressions:
+        rationale_parts.append("Has clear progression(s)")
+    if ex.intended_effects:
+        rationale_parts.append("Intended effects: " + ",".join(ex.intended_effects))
+    if ex.contraindications:
+        rationale_parts.append("Contraindications: " + ",".join(ex.contraindications))
+    return rationale_parts
+
+# ---------- Batch recommendations ----------
+def pain_level_band(pain_level: int) -> int:
+    """
+    Pain levels inside one band produce identical recommendations: the
+    thresholds used by suitability (5, 8), intensity bonus (4, 7), dosage (5, 8)
+    and desired_count (8) split 1..10 into 1-3, 4, 5-6, 7 and 8-10.
+    """
+    if pain_level >= 8:
+        return 4
+    if pain_level >= 7:
         return 3
+    if pain_level >= 5:
+        return 2
+    if pain_level >= 4:
+        return 1
+    return 0
 
-    results.sort(key=ordering_key)
-    return results
+def _item_field(item: Any, name: str) -> Any:
+    return item[name] if isinstance(item, dict) else getattr(item, name)
 
-# ---------- Optional helper: simple training hook (placeholder) ----------
-def train_simple_model(training_data: List[Dict[str, Any]]) -> None:
+def recommend_exercises_batch(
+    items: Iterable[Any],
+    available_equipment: Optional[List[str]] = None,
+    desired_count: Optional[int] = None,
+    fields: Optional[Iterable[str]] = None
+) -> Iterator[Tuple[int, Tuple[str, str, int], List[Dict[str, Any]]]]:
     """
-    Placeholder for training a lightweight model if you collect clinician-labeled outcomes.
-    training_data could be a list of dicts with keys:
-      - features: dict
-      - label: 0/1 whether clinician approved
-    Implement offline training (sklearn) and persist weights for runtime inference.
+    Lazily yields (index, group_key, recommendations) for each item, in input order.
+    items: PainData objects or dicts with injuryPlace, painType and painLevel.
+    Items sharing (injuryPlace, painType, painLevel band) are scored once; every
+    item of a group receives the same result list, so treat it as read-only.
+    fields: as for recommend_exercises().
     """
-    # Example: use logistic regression on engineered features (target match, pain_type compat, intensity)
-    # Not implemented here. Keep as a hook.
-    pass
-
+    groups: Dict[Tuple[str, str, int], List[Dict[str, Any]]] = {}
+    for index, item in enumerate(items):
+        injury_place = _item_field(item, "injuryPlace").lower()
+        pain_type = _item_field(item, "painType").lower()
+        pain_level = _item_field(item, "painLevel")
+        key = (injury_place, pain_type, pain_level_band(pain_level))
+        results = groups.get(key)
+        if results is None:
+            results = recommend_exercises(
+                injury_place=injury_place,
+                pain_level=pain_level,
+                pain_type=pain_type,
+                available_equipment=available_equipment,
+                desired_count=desired_count,
+                copy=False,
+                fields=fields
+            )
+            groups[key] = results
+        yield index, key, results
+
+# ---------- Training hook ----------
+def train_simple_model(training_data: List[Dict[str, Any]], C: float = 1.0) -> LinearScoringModel:
+    """
+    Fits a scoring model on clinician-labelled outcomes against the live
+    catalog. training_data: dicts with injuryPlace, painType, painLevel,
+    exerciseName, label (1 approved / 0 rejected) and optionally
+    availableEquipment (see recommender/training.py). Save the result with
+    model.save(path) and serve it by setting RECOMMEND_MODEL=path.
+    """
+    from recommender.training import fit_outcomes
+    return fit_outcomes(_current_catalog(), training_data, C=C)
@@ -0,0 +1,91 @@
+# recommender/scoring_model.py
+import os, json, math
+from typing import Any, Dict, Mapping, Optional
+import numpy as np
+
+# ---------- Learned scoring model ----------
+# A linear model over the recommender's scoring signals, fitted offline by
+# recommender/training.py from clinician-labelled outcomes. At request time
+# the candidates' signals are stacked into a (candidates x FEATURES) matrix
+# and scored with one dot product, so a learned model costs what the hand
+# WEIGHTS cost. Candidates are ranked on that dot product (the logit): the
+# approval probabilities tie in float once the sigmoid saturates, so they are
+# only computed for display. share_floor() turns the selection's "share of
+# the top score" floor, which is meant for probabilities, into a logit.
+#
+# The artifact is a small JSON file (feature names, weights, intercept and
+# training metadata); nothing here imports scikit-learn.
+
+FORMAT_VERSION = 1
+
+# column order of the feature matrix; names match _candidate_signals()
+FEATURES = (
+    "target_match", "pain_type_compat", "pain_level_suitability", "contraindication_penalty",
+    "equipment_match", "intensity_match", "progression_bonus"
+)
+
+def feature_matrix(signals: Mapping[str, np.ndarray]) -> np.ndarray:
+    """The signals of _candidate_signals() as a float matrix, one row per candidate."""
+    return np.column_stack([np.asarray(signals[name], dtype=float) for name in FEATURES])
+
+def probability(logits: np.ndarray) -> np.ndarray:
+    # 1 / (1 + exp(-logits)) without overflowing for very negative logits
+    return np.exp(-np.logaddexp(0.0, -logits))
+
+def share_floor(top_logit: float, share: float) -> float:
+    """
+    The logit whose probability is `share` x the probability of top_logit:
+    log(share) - log(1 - share + exp(-top_logit)), computed without overflow.
+    """
+    return math.log(share) - float(np.logaddexp(math.log(1.0 - share), -top_logit))
+
+class LinearScoringModel:
+    def __init__(self, weights, intercept: float = 0.0, metadata: Optional[Dict[str, Any]] = None):
+        self.weights = np.asarray(weights, dtype=float)
+        if self.weights.shape != (len(FEATURES),):
+            raise ValueError(f"Expected {len(FEATURES)} weights, got shape {self.weights.shape}")
+        self.intercept = float(intercept)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_weights(cls, weights: Mapping[str, float]) -> "LinearScoringModel":
+        """The hand-tuned WEIGHTS as a linear model (the penalty is subtracted there), for comparisons."""
+        return cls(
+            [-weights[name] if name == "contraindication_penalty" else weights[name] for name in FEATURES],
+            metadata={"source": "hand weights"}
+        )
+
+    def logits(self, features: np.ndarray) -> np.ndarray:
+        return features @ self.weights + self.intercept
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """Predicted probability of clinician approval."""
+        return probability(self.logits(features))
+
+    def coefficients(self) -> Dict[str, float]:
+        return dict(zip(FEATURES, self.weights.tolist()))
+
+    def save(self, path: str) -> None:
+        artifact = {
+            "format": FORMAT_VERSION,
+            "features": list(FEATURES),
+            "weights": self.weights.tolist(),
+            "intercept": self.intercept,
+            "metadata": self.metadata,
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(artifact, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def __repr__(self) -> str:
+        return f"LinearScoringModel({self.coefficients()}, intercept={self.intercept:.3f})"
+
+def load_scoring_model(path: str) -> LinearScoringModel:
+    """Raises ValueError if the artifact is of another format or was trained on other features."""
+    with open(path, encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported scoring model format {artifact.get('format')!r}")
+    if tuple(artifact.get("features", ())) != FEATURES:
+        raise ValueError(f"Scoring model features {artifact.get('features')} do not match {list(FEATURES)}")
+    return LinearScoringModel(artifact["weights"], artifact["intercept"], artifact.get("metadata"))
@@ -0,0 +1,129 @@
+# recommender/selection.py
+from typing import Callable, Iterator, List, Optional, Tuple
+import numpy as np
+from recommender.exercise_record import ExerciseRecord
+
+# ---------- Diverse top-k selection ----------
+# A recommendation returns 3-4 exercises, but the scored shortlist can hold
+# thousands of candidates (large catalogs, or the related-areas fallback).
+# Instead of building and sorting the whole pool, candidates are streamed in
+# rank order one block at a time: np.partition finds the block's score cutoff,
+# only that block is sorted, and the next block is cut only if selection asks
+# for more. Records are looked up only for candidates that selection reaches.
+#
+# Rank order is score descending, then shortlist position ascending (what a
+# stable sort of the whole pool gives), so results match the full sort.
+
+def ranked(scores: np.ndarray, candidates: np.ndarray, block: int = 16) -> Iterator[Tuple[int, float]]:
+    """
+    Yields (position, score) for `candidates` (shortlist positions) in rank
+    order, lazily. Each block is twice the previous one, so a consumer that
+    needs k candidates sorts O(k) of them plus one partition per block.
+    """
+    remaining = np.asarray(candidates, dtype=np.intp)
+    remaining_scores = scores[remaining]
+    while len(remaining):
+        if len(remaining) > block:
+            # everything scoring at least the block-th best, ties included, so
+            # no tie straddles two blocks
+            cutoff = np.partition(remaining_scores, len(remaining) - block)[len(remaining) - block]
+            take = remaining_scores >= cutoff
+            head, head_scores = remaining[take], remaining_scores[take]
+            remaining, remaining_scores = remaining[~take], remaining_scores[~take]
+        else:
+            head, head_scores = remaining, remaining_scores
+            remaining = remaining[:0]
+        order = np.lexsort((head, -head_scores))
+        yield from zip(head[order].tolist(), head_scores[order].tolist())
+        block *= 2
+
+class _Stream:
+    """A ranked() stream that remembers what it has produced, so a second pass can replay it."""
+
+    def __init__(self, source: Iterator[Tuple[int, float]]):
+        self._source = source
+        self.consumed: List[Tuple[int, float]] = []
+
+    def __iter__(self) -> Iterator[Tuple[int, float]]:
+        index = 0
+        while True:
+            if index < len(self.consumed):
+                yield self.consumed[index]
+            else:
+                item = next(self._source, None)
+                if item is None:
+                    return
+                self.consumed.append(item)
+                yield item
+            index += 1
+
+# share of the top score a same-type candidate needs to be taken anyway
+SCORE_FLOOR = 0.35
+
+def select_diverse(
+    scores: np.ndarray,
+    candidates: np.ndarray,
+    record_at: Callable[[int], ExerciseRecord],
+    desired_count: int,
+    score_floor: float = SCORE_FLOOR,
+    floor_of: Optional[Callable[[float], float]] = None
+) -> List[Tuple[int, float, ExerciseRecord]]:
+    """
+    Picks up to desired_count candidates as (position, score, record), in
+    selection order:
+    - walking down the ranking, a candidate is taken if it adds a new
+      exerciseType or effects disjoint from those already taken, or else if
+      it scores at least score_floor x the top score (floor_of(top score)
+      when given, for scores on another scale);
+    - if that leaves the selection short, it is filled from the top of the
+      ranking with candidates not yet taken;
+    - repeated exercise names (case-insensitive) are then dropped, keeping
+      the first.
+    Candidates are consumed only until desired_count is reached.
+    """
+    stream = _Stream(ranked(scores, candidates))
+    selected: List[Tuple[int, float, ExerciseRecord]] = []
+    selected_pos = set()
+    types_seen = set()
+    effects_seen = set()
+    top_score = None
+    floor = None
+
+    for pos, score in stream:
+        if len(selected) >= desired_count:
+            break
+        ex = record_at(pos)
+        if top_score is None:
+            top_score = score
+            floor = floor_of(score) if floor_of is not None else score * score_floor
+            selected.append((pos, score, ex))
+            selected_pos.add(pos)
+            types_seen.add(ex.exerciseType)
+            effects_seen.update(ex.intended_effects)
+            continue
+
+        if ex.exerciseType not in types_seen or effects_seen.isdisjoint(ex.intended_effects):
+            selected.append((pos, score, ex))
+            selected_pos.add(pos)
+            types_seen.add(ex.exerciseType)
+            effects_seen.update(ex.intended_effects)
+        elif score >= floor:
+            selected.append((pos, score, ex))
+            selected_pos.add(pos)
+
+    # fill with the top remaining
+    if len(selected) < desired_count:
+        for pos, score in stream:
+            if len(selected) >= desired_count:
+                break
+            if pos not in selected_pos:
+                selected.append((pos, score, record_at(pos)))
+                selected_pos.add(pos)
+
+    unique = []
+    seen_names = set()
+    for item in selected:
+        if item[2].name_key not in seen_names:
+            seen_names.add(item[2].name_key)
+            unique.append(item)
+    return unique
@@ -0,0 +1,163 @@
+# recommender/training.py
+import json, logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from recommender.catalog import CompiledCatalog
+from recommender.scoring_model import FEATURES, LinearScoringModel, feature_matrix
+
+logger = logging.getLogger("recommender.training")
+
+# ---------- Offline training ----------
+# Fits the learned scoring model (see scoring_model.py) from clinician-labelled
+# outcomes, one JSON object per line:
+#
+#   {"injuryPlace": "knee", "painType": "sharp", "painLevel": 6,
+#    "exerciseName": "quad sets", "label": 1, "availableEquipment": ["band"]}
+#
+# label is 1 when the clinician approved the exercise for that case, else 0;
+# availableEquipment is optional. Features are the recommender's own scoring
+# signals: outcomes are grouped by case, each case's signals are computed
+# once over the whole catalog (the vectorized _candidate_signals), and the
+# labelled exercises' rows are gathered into the feature matrix.
+#
+# python -m recommender.training fit --outcomes outcomes.jsonl --out recommend_model.json
+# then set RECOMMEND_MODEL=recommend_model.json to serve it.
+
+def load_outcomes(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _case_key(outcome: Dict[str, Any]) -> Tuple[str, str, int, Tuple[str, ...]]:
+    return (
+        outcome["injuryPlace"].lower(),
+        outcome["painType"].lower(),
+        int(outcome["painLevel"]),
+        tuple(sorted({e.lower() for e in outcome.get("availableEquipment") or []}))
+    )
+
+def build_features(catalog: CompiledCatalog, outcomes: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    (X, y, skipped): the feature matrix (outcomes x FEATURES) and labels of the
+    outcomes whose exercise is in the catalog; skipped counts the others.
+    """
+    from recommender.recommender import _candidate_signals
+
+    row_of: Dict[str, int] = {}
+    for row, record in enumerate(catalog.records):
+        row_of.setdefault(record.name_key, row)
+
+    # case -> [(catalog row, label)]
+    cases: Dict[Tuple[str, str, int, Tuple[str, ...]], List[Tuple[int, int]]] = {}
+    skipped = 0
+    for outcome in outcomes:
+        row = row_of.get(str(outcome.get("exerciseName", "")).lower())
+        if row is None:
+            skipped += 1
+            continue
+        cases.setdefault(_case_key(outcome), []).append((row, int(bool(outcome["label"]))))
+
+    all_rows = np.arange(catalog.size)
+    blocks, labels = [], []
+    for (injury_place, pain_type, pain_level, equipment), labelled in cases.items():
+        signals = _candidate_signals(catalog, all_rows, injury_place, pain_level, pain_type, list(equipment))
+        rows, case_labels = zip(*labelled)
+        blocks.append(feature_matrix(signals)[list(rows)])
+        labels.extend(case_labels)
+
+    X = np.vstack(blocks) if blocks else np.zeros((0, len(FEATURES)))
+    return X, np.asarray(labels, dtype=int), skipped
+
+def fit_model(X: np.ndarray, y: np.ndarray, C: float = 1.0) -> LinearScoringModel:
+    """L2-regularized logistic regression on the scoring features."""
+    from sklearn.linear_model import LogisticRegression
+
+    if len(np.unique(y)) < 2:
+        raise ValueError("Outcomes need both approved (1) and rejected (0) labels")
+    classifier = LogisticRegression(C=C, max_iter=1000)
+    classifier.fit(X, y)
+    return LinearScoringModel(classifier.coef_[0], classifier.intercept_[0])
+
+def evaluate(model: LinearScoringModel, X: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    """ROC AUC of the model's scores (ranking quality, comparable with the hand weights) and sample counts."""
+    from sklearn.metrics import roc_auc_score
+
+    if len(np.unique(y)) < 2:
+        return {"samples": int(len(y)), "auc": float("nan")}
+    return {"samples": int(len(y)), "auc": round(float(roc_auc_score(y, model.score(X))), 4)}
+
+def holdout_split(y: np.ndarray, holdout: float, seed: int = 0) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (train, test) indexes of a stratified split, so both keep the label mix,
+    or None when a label has too few outcomes to be on both sides.
+    """
+    from sklearn.model_selection import train_test_split
+
+    if np.bincount(y, minlength=2).min() < 2:
+        return None
+    try:
+        train, test = train_test_split(np.arange(len(y)), test_size=holdout, random_state=seed, stratify=y)
+    except ValueError:  # test share too small to hold both labels
+        return None
+    return train, test
+
+def fit_outcomes(
+    catalog: CompiledCatalog,
+    outcomes: List[Dict[str, Any]],
+    C: float = 1.0,
+    holdout: float = 0.2,
+    seed: int = 0
+) -> LinearScoringModel:
+    """
+    Fits on all outcomes; a stratified `holdout` share is first held out to
+    report how the learned model and the hand weights rank unseen outcomes.
+    """
+    from recommender.recommender import WEIGHTS
+
+    X, y, skipped = build_features(catalog, outcomes)
+    if skipped:
+        logger.warning(f"Skipped {skipped} outcomes whose exercise is not in the catalog")
+
+    metadata: Dict[str, Any] = {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "catalog_etag": catalog.etag,
+        "samples": int(len(y)),
+        "positives": int(y.sum()),
+        "skipped": skipped,
+        "C": C,
+    }
+    split = holdout_split(y, holdout, seed) if 0 < holdout < 1 and len(y) >= 10 else None
+    if split is not None:
+        train, test = split
+        metadata["holdout"] = {
+            "learned": evaluate(fit_model(X[train], y[train], C), X[test], y[test]),
+            "hand_weights": evaluate(LinearScoringModel.from_weights(WEIGHTS), X[test], y[test]),
+        }
+    elif 0 < holdout < 1:
+        logger.warning(f"Not enough outcomes of each label for a {holdout:.0%} holdout; reporting no holdout metrics")
+
+    model = fit_model(X, y, C)
+    model.metadata = metadata
+    return model
+
+
+# python -m recommender.training fit --outcomes PATH --out PATH [--C 1.0] [--holdout 0.2]
+if __name__ == "__main__":
+    import argparse
+    from recommender.recommender import _current_catalog
+
+    parser = argparse.ArgumentParser(description="Train the recommender's scoring model")
+    parser.add_argument("command", choices=["fit"])
+    parser.add_argument("--outcomes", required=True, help="JSON lines of labelled outcomes")
+    parser.add_argument("--out", default="recommend_model.json")
+    parser.add_argument("--C", type=float, default=1.0, help="inverse regularization strength")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share held out for the reported AUCs (0: none)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model = fit_outcomes(_current_catalog(), load_outcomes(args.outcomes), args.C, args.holdout, args.seed)
+    model.save(args.out)
+    logger.info(f"Saved {model} to {args.out}")
+    logger.info(f"Training summary: {json.dumps(model.metadata)}")
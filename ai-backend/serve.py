@@ -0,0 +1,105 @@
+# serve.py
+#
+# Multi-worker launcher with an optional preload-then-fork mode.
+#
+#   python serve.py --workers 4             # like `uvicorn main:app --workers 4`
+#   python serve.py --workers 4 --preload   # load models once, then fork
+#
+# With --preload the parent imports the app and loads every fork-safe registry
+# component (spaCy, the spell checker, the embedding model, the exercise
+# catalog) before forking, so workers share those pages copy-on-write instead
+# of each loading its own copy. gc.freeze() moves the preloaded objects out of
+# the collector's reach, so collections in the workers don't write to (and
+# un-share) those pages. Database clients are never created before the fork;
+# each worker opens its own on first use. No inference runs in the parent, so
+# torch's thread pools are first started inside the workers.
+import os, gc, sys, time, signal, socket, logging, argparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("AI Physio Serve")
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock: socket.socket, args) -> None:
+    import uvicorn
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AI Physio backend")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--preload", action="store_true", default=os.getenv("AI_PRELOAD_FORK", "0") == "1")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    from main import app
+    from utils.registry import registry
+
+    if args.preload:
+        registry.preload(fork_safe_only=True, ignore_errors=True)
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Preloaded in {time.perf_counter() - started:.2f}s before forking")
+        logger.info(registry.format_report())
+
+    sock = _bind(args.host, args.port)
+    if args.workers <= 1:
+        _run_worker(app, sock, args)
+        return
+
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _run_worker(app, sock, args)
+            finally:
+                os._exit(0)
+        workers[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started_at = workers.pop(pid, None)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited ({status}); restarting")
+            if started_at is not None and time.monotonic() - started_at < 1:
+                time.sleep(1)  # don't spin on a worker that dies at startup
+            spawn()
+    logger.info("All workers stopped")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# tests/test_asset_store.py
+#
+# Run from ai-backend/:  python -m pytest tests
+import base64, csv, io
+
+from recommender.asset_store import AssetStore
+from recommender.recommender import parse_exercises
+
+PNG = b"\x89PNG\r\n\x1a\nnot really a png"
+GOOD = "data:image/png;base64," + base64.b64encode(PNG).decode("ascii")
+MALFORMED = "data:image/png;base64,abc"
+
+def test_malformed_data_uri_keeps_the_row_image(tmp_path):
+    store = AssetStore(str(tmp_path))
+    text = io.StringIO(newline="")
+    csv.writer(text).writerows([
+        ["exerciseName", "targetArea", "image"],
+        ["quad sets", "knee", GOOD],
+        ["wall slides", "shoulder", MALFORMED],
+        ["heel raises", "ankle", "https://example.com/heel-raises.png"],
+    ])
+    text.seek(0)
+
+    rows = {ex["exerciseName"]: ex for ex in parse_exercises(text, store)}
+
+    assert len(rows) == 3
+    assert rows["quad sets"]["image"] == "" and store.data_uri(rows["quad sets"]["imageId"]) == GOOD
+    assert rows["wall slides"]["image"] == MALFORMED and rows["wall slides"]["imageId"] is None
+    assert rows["heel raises"]["imageId"] is None
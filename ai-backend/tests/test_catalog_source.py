@@ -0,0 +1,24 @@
+# tests/test_catalog_source.py
+#
+# Run from ai-backend/:  python -m pytest tests
+import csv, hashlib
+
+from recommender.catalog import CatalogManager, CsvCatalogSource
+
+ORIGINAL = "exerciseName,targetArea\nquad sets,knee\n"
+REWRITTEN = "exerciseName,targetArea\nwall slides,shoulder\n"
+
+def test_etag_matches_the_parsed_bytes_when_the_file_is_rewritten(tmp_path):
+    path = tmp_path / "exercises.csv"
+    path.write_text(ORIGINAL, encoding="utf-8")
+
+    def parse(lines):
+        rows = list(csv.DictReader(lines))
+        # the file changes while the previous contents are being parsed
+        path.write_text(REWRITTEN, encoding="utf-8")
+        return rows
+
+    manager = CatalogManager(CsvCatalogSource(str(path), parse))
+    catalog = manager.current
+    assert [row["exerciseName"] for row in catalog.exercises] == ["quad sets"]
+    assert catalog.etag == hashlib.sha256(ORIGINAL.encode("utf-8")).hexdigest()[:16]
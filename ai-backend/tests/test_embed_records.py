@@ -0,0 +1,37 @@
+# tests/test_embed_records.py
+#
+# Run from ai-backend/:  python -m pytest tests
+import asyncio
+import numpy as np
+
+from validators import pain_data_duplicates as duplicates
+from validators.embedding_store import EmbeddingStore
+
+DIM = 8
+
+def _fake_encode(calls):
+    async def encode(texts):
+        calls.append(list(texts))
+        rng = np.random.default_rng(len(calls))
+        vectors = rng.normal(size=(len(texts), DIM)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return encode
+
+def test_embed_records_all_stored(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(duplicates, "embedding_store", EmbeddingStore(str(tmp_path), "test-model"))
+    monkeypatch.setattr(duplicates.embedding_batcher, "encode", _fake_encode(calls))
+    ids, norms = ["a", "b", "c"], ["knee hurts on stairs", "sharp pain when running", "stiff in the morning"]
+
+    first = asyncio.run(duplicates.embed_records(ids, norms))
+    assert first.shape == (3, DIM) and len(calls) == 1
+
+    # the second check of the same history is served entirely by the store
+    second = asyncio.run(duplicates.embed_records(ids, norms))
+    assert len(calls) == 1
+    np.testing.assert_allclose(second, first)
+
+    # only the records missing from the store are encoded
+    mixed = asyncio.run(duplicates.embed_records(ids + ["d"], norms + ["swollen after a long walk"]))
+    assert mixed.shape == (4, DIM) and calls[-1] == ["swollen after a long walk"]
+    np.testing.assert_allclose(mixed[:3], first)
@@ -0,0 +1,58 @@
+# tests/test_embedding_batcher.py
+#
+# Run from ai-backend/:  python -m pytest tests
+import asyncio
+import numpy as np
+import pytest
+
+from validators.embedding_batcher import EmbeddingBatcher
+
+def test_callers_are_failed_when_a_batch_breaks_after_encoding():
+    # one row too few: the failure happens while handing out results, not in encode_fn
+    batcher = EmbeddingBatcher(lambda texts: np.zeros((len(texts) - 1, 4), dtype=np.float32), max_wait=0.001)
+
+    async def main():
+        callers = [batcher.encode(["knee pain"]), batcher.encode(["shoulder pain", "knee pain"])]
+        results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=5)
+        await asyncio.sleep(0)
+        return results
+
+    results = asyncio.run(main())
+    assert any(isinstance(r, IndexError) for r in results)
+    assert all(isinstance(r, (np.ndarray, IndexError)) for r in results)
+    assert not batcher._tasks
+
+def test_batches_in_flight_are_referenced_until_done():
+    release = None
+
+    async def run(fn, texts):
+        await release.wait()
+        return fn(texts)
+
+    batcher = EmbeddingBatcher(lambda texts: np.eye(len(texts), dtype=np.float32), max_batch=1, run=run)
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        caller = asyncio.ensure_future(batcher.encode(["knee pain"]))
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        release.set()
+        result = await asyncio.wait_for(caller, timeout=5)
+        await asyncio.sleep(0)
+        return result
+
+    np.testing.assert_allclose(asyncio.run(main()), np.eye(1))
+    assert not batcher._tasks
+
+def test_encode_errors_reach_every_caller():
+    def encode_fn(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = EmbeddingBatcher(encode_fn, max_wait=0.001)
+
+    async def main():
+        await asyncio.gather(batcher.encode(["a"]), batcher.encode(["b"]))
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(main())
@@ -0,0 +1,29 @@
+# tests/test_result_cache.py
+#
+# Run from ai-backend/:  python -m pytest tests
+from recommender import recommender
+
+def test_result_computed_on_replaced_catalog_is_not_cached(monkeypatch):
+    recommender.RESULT_CACHE.invalidate()
+    real_compute = recommender._recommend_exercises_uncached
+    top_name = real_compute(recommender._current_catalog(), "knee", 5, "sharp")[0]["exerciseName"]
+    replacement = [ex for ex in recommender.EXERCISES_DB if ex["exerciseName"] != top_name]
+    newer = {}
+
+    def compute(*args, **kwargs):
+        # the first request is still scoring on the old catalog when a new one
+        # is published and served
+        result = real_compute(*args, **kwargs)
+        if recommender.EXERCISES_DB is not replacement:
+            monkeypatch.setattr(recommender, "EXERCISES_DB", replacement)
+            newer["result"] = recommender.recommend_exercises("knee", 5, "sharp", copy=False)
+        return result
+
+    monkeypatch.setattr(recommender, "_recommend_exercises_uncached", compute)
+    stale = recommender.recommend_exercises("knee", 5, "sharp", copy=False)
+    assert stale[0]["exerciseName"] == top_name
+
+    served = recommender.recommend_exercises("knee", 5, "sharp", copy=False)
+    assert served == newer["result"]
+    assert top_name not in [ex["exerciseName"] for ex in served]
+    recommender.RESULT_CACHE.invalidate()
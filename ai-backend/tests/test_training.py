@@ -0,0 +1,34 @@
+# tests/test_training.py
+#
+# Run from ai-backend/:  python -m pytest tests
+import numpy as np
+
+from recommender.recommender import _current_catalog
+from recommender.training import fit_outcomes, holdout_split
+
+def _outcomes(catalog, positives, total):
+    names = [record.name_key for record in catalog.records][:total]
+    return [
+        {"injuryPlace": "knee", "painType": "sharp", "painLevel": 5, "exerciseName": name, "label": int(i < positives)}
+        for i, name in enumerate(names)
+    ]
+
+def test_rare_label_is_kept_on_both_sides_of_the_holdout():
+    catalog = _current_catalog()
+    outcomes = _outcomes(catalog, positives=2, total=20)
+    for seed in range(20):
+        model = fit_outcomes(catalog, outcomes, holdout=0.2, seed=seed)
+        holdout = model.metadata["holdout"]
+        assert holdout["learned"]["samples"] == holdout["hand_weights"]["samples"] == 4
+
+    y = np.array([outcome["label"] for outcome in outcomes])
+    for seed in range(20):
+        train, test = holdout_split(y, 0.2, seed)
+        assert y[train].sum() >= 1 and len(np.unique(y[train])) == 2
+
+def test_single_positive_skips_the_holdout():
+    catalog = _current_catalog()
+    for seed in range(10):
+        model = fit_outcomes(catalog, _outcomes(catalog, positives=1, total=20), holdout=0.2, seed=seed)
+        assert "holdout" not in model.metadata
+        assert model.metadata["positives"] == 1
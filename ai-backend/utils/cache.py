@@ -0,0 +1,107 @@
+# utils/cache.py
+import time, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with an optional TTL (seconds, None = no expiry)
+    and hit/miss/eviction counters.
+    A generation token can be attached: when set_generation() receives a value
+    different from the current one, every entry is dropped. get_or_compute()
+    takes the generation its value is computed for, so a value computed while
+    another caller moved the cache to a newer generation is not stored.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generation: Any = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    # ---------- callers hold self._lock ----------
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, stored_at = entry
+            if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return _MISSING
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], generation: Any = _MISSING) -> Any:
+        if generation is _MISSING:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+                self.set(key, value)
+            return value
+
+        # switching generation and looking up happen under one lock, so the
+        # lookup never sees another generation's entries
+        with self._lock:
+            self._set_generation(generation)
+            value = self._lookup(key)
+        if value is _MISSING:
+            value = compute()
+            with self._lock:
+                # computed outside the lock; drop it if the generation moved on
+                if self._generation == generation:
+                    self._store(key, value)
+        return value
+
+    def set_generation(self, generation: Any) -> None:
+        with self._lock:
+            self._set_generation(generation)
+
+    def _set_generation(self, generation: Any) -> None:
+        if generation != self._generation:
+            self._data.clear()
+            self._generation = generation
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
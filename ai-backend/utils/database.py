@@ -0,0 +1,36 @@
+# utils/database.py
+import os, threading
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+# -----------------------------
+# Shared, pooled MongoDB client
+# -----------------------------
+# MongoClient keeps its own connection pool and is thread-safe, so one
+# instance per process is enough. It is created on first use so importing
+# this module never opens a connection.
+_sync_client = None
+_sync_lock = threading.Lock()
+
+def get_sync_client() -> MongoClient:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = MongoClient(
+                    os.getenv("MONGO_URI"),
+                    maxPoolSize=int(os.getenv("MONGO_POOL_SIZE", "10")),
+                )
+    return _sync_client
+
+def get_sync_db():
+    return get_sync_client()[os.getenv("DB_NAME")]
+
+def close_sync_client() -> None:
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
@@ -0,0 +1,198 @@
+# utils/ingest.py
+import os, re, json, logging
+from typing import Any, FrozenSet, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from utils.metrics import metrics, log_event
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # plain json is slower but parses the same documents
+    _loads = json.loads
+
+logger = logging.getLogger("Ingest")
+
+# -----------------------------
+# Request body ingest
+# -----------------------------
+# The Node backend forwards whole pain-data documents, doctorSlip upload
+# included, although no AI stage reads the slip. read_json() streams the body
+# and drops the values of SKIPPED_FIELDS (keys, at any depth, so batches of
+# documents are covered too) as the bytes arrive,
+# so a multi-megabyte slip is neither buffered, decoded nor validated: the
+# decoder sees `"doctorSlip": null`. Everything else is parsed with orjson.
+#
+# AI_MAX_REQUEST_BYTES caps the body size (413 beyond it; 0 disables the cap).
+# It counts the skipped bytes too, so it bounds what a client can make us read.
+MAX_REQUEST_BYTES = int(os.getenv("AI_MAX_REQUEST_BYTES", str(16 * 1024 * 1024)))
+SKIPPED_FIELDS: FrozenSet[bytes] = frozenset({b"doctorSlip"})
+
+INGEST_BYTES = metrics.counter(
+    "ai_ingest_bytes_total", "Request body bytes read by the JSON ingest path", ("outcome",)
+)
+
+# structural characters outside strings; inside a skipped container only nesting matters
+_STRUCTURE = re.compile(rb'["{}\[\]:,]')
+_NESTING = tuple(bytes([c]) for c in b'"{}[]')
+_STRING_END = (b"\\", b'"')  # backslash first: its search bounds the quote's
+_MAX_KEY_BYTES = 64
+
+def _find_first(chunk: bytes, start: int, needles) -> int:
+    """Position of the first of the single-byte needles at or after start, or -1.
+    bytes.find is a memchr, several times faster than a regex class over long runs."""
+    best = len(chunk)
+    for needle in needles:
+        position = chunk.find(needle, start, best)
+        if position >= 0:
+            best = position
+    return best if best < len(chunk) else -1
+
+class FieldStripper:
+    """
+    Incremental JSON filter: feed() it the body in chunks and it keeps every
+    byte except the values of the given keys, which become null.
+    It only tracks strings and nesting, jumping between them with C-level
+    searches, so a long base64 string or a Buffer's number array is skipped
+    in a few calls per chunk;
+    malformed input passes through and fails in the decoder.
+    """
+
+    def __init__(self, fields: FrozenSet[bytes] = SKIPPED_FIELDS):
+        self.fields = fields
+        self.kept = bytearray()
+        self.skipped = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False          # a backslash ended the previous chunk
+        self._key: Any = None          # bytearray while reading a string that may be a key
+        self._last_string: Any = None  # the last string read, a key if ':' follows
+        self._skipping = False
+        self._skip_depth = 0           # nesting level of the object holding the skipped key
+        self._skip_start = 0
+
+    def feed(self, chunk: bytes) -> None:
+        i, n = 0, len(chunk)
+        keep_from = 0
+        while i < n:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    i += 1
+                    continue
+                end = _find_first(chunk, i, _STRING_END)
+                if end < 0:
+                    end = n
+                if self._key is not None:
+                    self._key += chunk[i:end]
+                    if len(self._key) > _MAX_KEY_BYTES:
+                        self._key = None
+                if end == n:
+                    i = n
+                elif chunk[end] == 0x5C:  # backslash: the next byte is escaped
+                    if self._key is not None:
+                        self._key += chunk[end:end + 2]
+                    self._escaped = end + 1 >= n
+                    i = end + 2
+                else:
+                    self._in_string = False
+                    self._last_string = bytes(self._key) if self._key is not None else None
+                    self._key = None
+                    i = end + 1
+                continue
+
+            if self._skipping and self._depth > self._skip_depth:
+                j = _find_first(chunk, i, _NESTING)
+            else:
+                m = _STRUCTURE.search(chunk, i)
+                j = m.start() if m else -1
+            if j < 0:
+                break
+            c = chunk[j]
+            last_string, self._last_string = self._last_string, None
+            if c == 0x22:  # "
+                self._in_string = True
+                self._key = None if self._skipping else bytearray()
+            elif c in (0x7B, 0x5B):  # { [
+                self._depth += 1
+            elif c in (0x7D, 0x5D):  # } ]
+                if self._skipping and self._depth == self._skip_depth:
+                    keep_from = self._stop_skipping(j)
+                self._depth -= 1
+            elif c == 0x3A:  # :
+                if not self._skipping and last_string in self.fields:
+                    self.kept += chunk[keep_from:j + 1]
+                    self.kept += b"null"
+                    self._skipping = True
+                    self._skip_depth = self._depth
+                    self._skip_start = keep_from = j + 1
+            elif c == 0x2C:  # ,
+                if self._skipping and self._depth == self._skip_depth:
+                    keep_from = self._stop_skipping(j)
+            i = j + 1
+
+        if self._skipping:
+            self.skipped += n - self._skip_start
+            self._skip_start = 0
+        else:
+            self.kept += chunk[keep_from:]
+
+    def _stop_skipping(self, position: int) -> int:
+        self.skipped += position - self._skip_start
+        self._skipping = False
+        return position
+
+async def read_json(request: Request, skip: FrozenSet[bytes] = SKIPPED_FIELDS) -> Any:
+    """The decoded JSON body without the `skip` fields' values; 413 over the size cap, 400 if not JSON."""
+    declared = request.headers.get("content-length", "")
+    if MAX_REQUEST_BYTES and declared.isdigit() and int(declared) > MAX_REQUEST_BYTES:
+        _reject_oversized(int(declared))
+
+    stripper = FieldStripper(skip)
+    total = 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if MAX_REQUEST_BYTES and total > MAX_REQUEST_BYTES:
+            _reject_oversized(total)
+        stripper.feed(chunk)
+    INGEST_BYTES.inc(len(stripper.kept), outcome="parsed")
+    INGEST_BYTES.inc(stripper.skipped, outcome="skipped")
+
+    try:
+        return _loads(stripper.kept)
+    except ValueError as e:
+        log_event(logger, "invalid_json", level=logging.WARNING, sample_rate=1.0, error=type(e).__name__)
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+def _reject_oversized(size: int) -> None:
+    log_event(logger, "request_too_large", level=logging.WARNING, sample_rate=1.0, bytes=size, limit=MAX_REQUEST_BYTES)
+    raise HTTPException(status_code=413, detail=f"Request body exceeds {MAX_REQUEST_BYTES} bytes")
+
+Model = TypeVar("Model", bound=BaseModel)
+
+async def read_model(request: Request, model: Type[Model], skip: FrozenSet[bytes] = SKIPPED_FIELDS) -> Model:
+    """read_json() validated into `model`; 400 with the validation error otherwise."""
+    body = await read_json(request, skip)
+    try:
+        return model.model_validate(body)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid data format: {e}")
+
+async def read_body(request: Request, adapter: TypeAdapter, skip: FrozenSet[bytes] = SKIPPED_FIELDS) -> Any:
+    """
+    read_json() validated like a FastAPI body parameter (a 422 with the same
+    error list on failure), for routes that switched from a typed body to the
+    stripped ingest path without changing their error contract.
+    """
+    body = await read_json(request, skip)
+    try:
+        return adapter.validate_python(body)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+
+def body_schema(adapter: TypeAdapter) -> dict:
+    """openapi_extra documenting the body of a route that reads it with read_body()."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": adapter.json_schema()}}}}
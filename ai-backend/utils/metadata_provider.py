@@ -0,0 +1,117 @@
+# utils/metadata_provider.py
+import os, time, asyncio, threading, logging
+from typing import Dict, List, Optional, Tuple, Any
+
+from utils.database import get_sync_db
+from utils.metrics import metrics, stage_timer, cache_family
+
+# -----------------------------
+# Setup logging
+# -----------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Metadata Provider")
+
+# -----------------------------
+# Backends
+# -----------------------------
+class MongoMetadataBackend:
+    """Reads metadata documents ({dataName, data}) through the shared pooled client."""
+
+    def __init__(self, collection_name: Optional[str] = None):
+        self.collection_name = collection_name
+
+    def fetch(self, data_name: str) -> List[Any]:
+        collection = get_sync_db()[self.collection_name or os.getenv("METADATA_COLL")]
+        meta = collection.find_one({"dataName": data_name}, {"data": 1})
+        if meta and "data" in meta:
+            return meta["data"]
+        return []
+
+class InMemoryMetadataBackend:
+    """Dict-backed stand-in for tests and local runs without MongoDB."""
+
+    def __init__(self, data: Optional[Dict[str, List[Any]]] = None):
+        self.data = dict(data or {})
+
+    def set(self, data_name: str, values: List[Any]) -> None:
+        self.data[data_name] = list(values)
+
+    def fetch(self, data_name: str) -> List[Any]:
+        return list(self.data.get(data_name, []))
+
+# -----------------------------
+# Provider
+# -----------------------------
+class MetadataProvider:
+    """
+    Keeps metadata lists in memory with a TTL.
+    - The first read of a key loads it synchronously.
+    - Reads of a stale key return the cached value and schedule a background
+      refresh (stale-while-revalidate), so request handlers never wait on Mongo
+      once the cache is warm.
+    - invalidate() drops entries; refresh() reloads without blocking the event loop.
+    """
+
+    def __init__(self, backend=None, ttl: float = 300.0):
+        self.backend = backend if backend is not None else MongoMetadataBackend()
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[List[Any], float]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, data_name: str) -> List[Any]:
+        entry = self._entries.get(data_name)
+        if entry is None:
+            self.misses += 1
+            return self._load(data_name)
+        self.hits += 1
+        values, loaded_at = entry
+        if time.monotonic() - loaded_at >= self.ttl:
+            self._schedule_refresh(data_name)
+        return values
+
+    async def refresh(self, data_name: str) -> List[Any]:
+        return await asyncio.to_thread(self._load, data_name)
+
+    def invalidate(self, data_name: Optional[str] = None) -> None:
+        with self._lock:
+            if data_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(data_name, None)
+
+    def set_backend(self, backend) -> None:
+        self.backend = backend
+        self.invalidate()
+
+    def info(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "ttl": self.ttl}
+
+    def _load(self, data_name: str) -> List[Any]:
+        with stage_timer("metadata_lookup"):
+            values = self.backend.fetch(data_name)
+        with self._lock:
+            self._entries[data_name] = (values, time.monotonic())
+        return values
+
+    def _schedule_refresh(self, data_name: str) -> None:
+        with self._lock:
+            if data_name in self._refreshing:
+                return
+            self._refreshing.add(data_name)
+        threading.Thread(target=self._refresh_quietly, args=(data_name,), daemon=True).start()
+
+    def _refresh_quietly(self, data_name: str) -> None:
+        try:
+            self._load(data_name)
+        except Exception as e:
+            # keep serving the stale value; the next read will retry
+            logger.warning(f"Metadata refresh failed for '{data_name}': {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(data_name)
+
+metadata_provider = MetadataProvider(ttl=float(os.getenv("METADATA_CACHE_TTL", "300")))
+metrics.add_collector(lambda: [cache_family("metadata", metadata_provider.info())])
@@ -0,0 +1,154 @@
+# utils/metrics.py
+import os, time, random, logging, threading, bisect
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("Metrics")
+
+# -----------------------------
+# Metric types
+# -----------------------------
+# Latency buckets in seconds, 0.5 ms .. 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+# -----------------------------
+# Registry
+# -----------------------------
+class MetricsRegistry:
+    """
+    Counters and histograms updated on the request path, plus collectors:
+    callables run at scrape time that read counters other components already
+    keep (cache hits/misses, pool depths), so those paths need no extra work.
+    A collector returns (name, type, help, [(labels dict, value), ...]) tuples.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        # collectors may contribute samples to the same family (e.g. one per cache)
+        families: Dict[str, Tuple[str, str, List[Tuple[Dict[str, Any], float]]]] = {}
+        for collector in self._collectors:
+            try:
+                for name, kind, help, samples in collector():
+                    families.setdefault(name, (kind, help, []))[2].extend(samples)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        for name, (kind, help, samples) in families.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    "ai_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+STAGE_LATENCY = metrics.histogram(
+    "ai_stage_duration_seconds", "Latency of internal processing stages", ("stage",)
+)
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """with stage_timer("spacy"): ... records the block's duration under that stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+def cache_family(name: str, info: Dict[str, Any]):
+    """A collector family reporting a cache's hits/misses/evictions as ai_cache_events_total."""
+    samples = [({"cache": name, "event": event}, info[event]) for event in ("hits", "misses", "evictions") if event in info]
+    return ("ai_cache_events_total", "counter", "Cache lookups by outcome", samples)
+
+# -----------------------------
+# Sampled, payload-free hot-path logging
+# -----------------------------
+# LOG_SAMPLE_RATE: fraction of hot-path events logged (default 1%). Only the
+# fields passed in are logged, never request bodies.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+def log_event(log: logging.Logger, event: str, level: int = logging.INFO, sample_rate: Optional[float] = None, **fields: Any) -> None:
+    rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    if not log.isEnabledFor(level) or (rate < 1.0 and random.random() >= rate):
+        return
+    log.log(level, " ".join([f"event={event}"] + [f"{k}={v}" for k, v in fields.items()]))
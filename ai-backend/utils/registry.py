@@ -0,0 +1,125 @@
+# utils/registry.py
+import time, logging, threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# -----------------------------
+# Setup logging
+# -----------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Model Registry")
+
+class ModelRegistry:
+    """
+    Process-wide shared components (NLP models, database clients, compiled
+    data), built on first use instead of at import.
+
+    Modules register a factory under a name when they are imported (cheap) and
+    call get(name) where they need the object. get() is thread-safe:
+    concurrent first callers wait for a single build. The build time of every
+    component is kept for the startup report.
+
+    fork_safe=False marks components that must not be created before a fork
+    (network clients); preload(fork_safe_only=True) skips them.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._closers: Dict[str, Callable[[Any], None]] = {}
+        self._fork_safe: Dict[str, bool] = {}
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
+        self._failed: Set[str] = set()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], None]] = None,
+        fork_safe: bool = True
+    ) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._fork_safe[name] = fork_safe
+            if close is not None:
+                self._closers[name] = close
+
+    def get(self, name: str) -> Any:
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(f"No component registered as '{name}'")
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                try:
+                    instance = self._factories[name]()
+                except Exception:
+                    self._failed.add(name)
+                    self._timings[name] = time.perf_counter() - start
+                    raise
+                self._failed.discard(name)
+                self._timings[name] = time.perf_counter() - start
+                self._instances[name] = instance
+                logger.info(f"Loaded '{name}' in {self._timings[name]:.2f}s")
+        return self._instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def record(self, name: str, seconds: float) -> None:
+        """Adds a startup cost that isn't a registered component (e.g. imports) to the report."""
+        self._timings[name] = seconds
+
+    def preload(self, names: Optional[Iterable[str]] = None, fork_safe_only: bool = False, ignore_errors: bool = False) -> None:
+        for name in list(names) if names is not None else list(self._factories):
+            if fork_safe_only and not self._fork_safe.get(name, True):
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                if not ignore_errors:
+                    raise
+                logger.warning(f"Could not preload '{name}' (it will load on first use): {e}")
+
+    def report(self) -> List[Dict[str, Any]]:
+        rows = []
+        for name in dict.fromkeys(list(self._timings) + list(self._factories)):
+            rows.append({
+                "component": name,
+                "loaded": name in self._instances or name not in self._factories,
+                "failed": name in self._failed,
+                "seconds": round(self._timings.get(name, 0.0), 3),
+            })
+        return rows
+
+    def format_report(self) -> str:
+        rows = self.report()
+        lines = ["Startup report:"]
+        for row in rows:
+            if row["loaded"]:
+                status = f"{row['seconds']:8.2f}s"
+            elif row["failed"]:
+                status = f"{row['seconds']:8.2f}s  failed, will retry on first use"
+            else:
+                status = "    lazy"
+            lines.append(f"  {row['component']:<20} {status}")
+        lines.append(f"  {'total':<20} {sum(r['seconds'] for r in rows):8.2f}s")
+        return "\n".join(lines)
+
+    def close_all(self) -> None:
+        with self._lock:
+            instances = dict(self._instances)
+        for name, close in self._closers.items():
+            if name in instances:
+                try:
+                    close(instances[name])
+                except Exception as e:
+                    logger.warning(f"Closing '{name}' failed: {e}")
+                self._instances.pop(name, None)
+
+registry = ModelRegistry()
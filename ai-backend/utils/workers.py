@@ -0,0 +1,109 @@
+# utils/workers.py
+import os, asyncio, logging, multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional
+from fastapi import HTTPException
+from utils.metrics import metrics
+
+# -----------------------------
+# Setup logging
+# -----------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Worker Pools")
+
+class PoolSaturated(HTTPException):
+    def __init__(self, pool_name: str):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({pool_name}); please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+
+class WorkerPool:
+    """
+    Runs blocking/CPU-bound calls off the event loop with bounded admission.
+
+    mode="thread"  : ThreadPoolExecutor, for work that releases the GIL
+                     (torch inference, rapidfuzz, file I/O).
+    mode="process" : ProcessPoolExecutor, for GIL-bound Python work (spaCy,
+                     spell checking). `initializer` runs once per worker
+                     process, so models are loaded before the first task.
+
+    At most max_workers calls run and max_queue wait; beyond that run() raises
+    PoolSaturated (HTTP 503 with Retry-After) immediately instead of letting
+    latency grow without bound.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 32,
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        self.name = name
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+        _pools.append(self)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                context = multiprocessing.get_context(os.getenv("WORKER_START_METHOD", "spawn"))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context, initializer=self.initializer
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            logger.info(f"Started {self.mode} pool '{self.name}' ({self.max_workers} workers, queue {self.max_queue})")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # in_flight is only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(self.name)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args))
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_pools: List[WorkerPool] = []
+
+def _pool_families():
+    labels = lambda pool: {"pool": pool.name}
+    return [
+        ("ai_worker_pool_in_flight", "gauge", "Calls running or queued", [(labels(p), p.in_flight) for p in _pools]),
+        ("ai_worker_pool_queue_depth", "gauge", "Calls waiting for a worker", [(labels(p), p.queue_depth) for p in _pools]),
+        ("ai_worker_pool_rejected_total", "counter", "Calls rejected with 503", [(labels(p), p.rejected) for p in _pools]),
+    ]
+
+metrics.add_collector(_pool_families)
+
+def pool_from_env(prefix: str, default_mode: str = "thread", initializer: Optional[Callable[[], None]] = None) -> WorkerPool:
+    """Builds a pool configured by <PREFIX>_EXECUTOR, <PREFIX>_WORKERS and <PREFIX>_MAX_QUEUE."""
+    return WorkerPool(
+        name=prefix.lower(),
+        mode=os.getenv(f"{prefix}_EXECUTOR", default_mode),
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", "32")),
+        initializer=initializer
+    )
@@ -0,0 +1,42 @@
+# validators/embedding_backends.py
+import logging
+from typing import Dict, NamedTuple
+
+logger = logging.getLogger("Embedding Backends")
+
+class EmbeddingBackend(NamedTuple):
+    model_name: str
+    quantized: bool  # dynamic int8 quantization of the Linear layers (CPU inference)
+
+    @property
+    def store_name(self) -> str:
+        # quantized models produce slightly different vectors, so they get their own embedding store
+        return f"{self.model_name}-int8" if self.quantized else self.model_name
+
+# selected with EMBEDDING_BACKEND; mpnet is the model the thresholds were tuned on
+EMBEDDING_BACKENDS: Dict[str, EmbeddingBackend] = {
+    "mpnet": EmbeddingBackend("paraphrase-mpnet-base-v2", False),
+    "mpnet-int8": EmbeddingBackend("paraphrase-mpnet-base-v2", True),
+    "minilm": EmbeddingBackend("paraphrase-MiniLM-L6-v2", False),
+    "minilm-int8": EmbeddingBackend("paraphrase-MiniLM-L6-v2", True),
+}
+DEFAULT_EMBEDDING_BACKEND = "mpnet"
+
+def get_embedding_backend(name: str) -> EmbeddingBackend:
+    try:
+        return EMBEDDING_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}' (choose from {', '.join(EMBEDDING_BACKENDS)})")
+
+def load_embedding_model(name: str):
+    """Loads the SentenceTransformer for a backend, quantizing it to int8 if the backend asks for it."""
+    from sentence_transformers import SentenceTransformer
+
+    backend = get_embedding_backend(name)
+    logger.info(f"Loading SentenceTransformer model ({backend.store_name})...")
+    model = SentenceTransformer(backend.model_name, device="cpu" if backend.quantized else None)
+    if backend.quantized:
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    logger.info("Model loaded successfully.")
+    return model
@@ -0,0 +1,85 @@
+# validators/embedding_batcher.py
+import asyncio, logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+logger = logging.getLogger("Embedding Batcher")
+
+class EmbeddingBatcher:
+    """
+    Merges encode() calls from concurrent requests into one model invocation.
+
+    Callers await encode(texts). Requests are queued until either max_batch
+    texts are pending or max_wait seconds have passed since the first one, then
+    all pending texts (deduplicated) are encoded in a single call of encode_fn
+    on a worker thread, and each caller receives its own rows, in order.
+
+    encode_fn(texts) must return an (n, dim) array of L2-normalized embeddings.
+    run(fn, *args) executes it off the event loop (default: asyncio.to_thread);
+    pass a WorkerPool.run to get its admission limits.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        run: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        self.encode_fn = encode_fn
+        self.run = run or asyncio.to_thread
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer = None
+        # the loop only keeps weak references to tasks; batches in flight are held here
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        try:
+            # the same text (typically the new description) is only encoded once per batch
+            positions: Dict[str, int] = {}
+            unique: List[str] = []
+            for texts, _ in batch:
+                for text in texts:
+                    if text not in positions:
+                        positions[text] = len(unique)
+                        unique.append(text)
+            embeddings = await self.run(self.encode_fn, unique)
+            logger.debug(f"Encoded {len(unique)} texts for {len(batch)} callers")
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[[positions[t] for t in texts]])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            # no caller may be left waiting, whatever went wrong
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,144 @@
+# validators/embedding_store.py
+import os, re, json, hashlib, logging, threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; single-process dev servers don't need it
+    fcntl = None
+
+# -----------------------------
+# Setup logging
+# -----------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Embedding Store")
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class EmbeddingStore:
+    """
+    Persistent embeddings for stored pain descriptions, one set of files per model:
+      <root>/<model>.f32    raw float32 rows, append-only, read through np.memmap
+      <root>/<model>.jsonl  index lines {"id", "hash", "row", "dim"}
+    An entry is only used when both the record id and the hash of the embedded
+    text match, so an edited description is simply re-embedded.
+    Appends are serialized across worker processes with an flock; every process
+    tails the index file to pick up rows written by the others.
+    Any I/O failure disables the store (with one warning) and callers fall back
+    to encoding on the fly.
+    """
+
+    def __init__(self, root: str, model_name: str):
+        self.root = root
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vectors_path = os.path.join(root, f"{slug}.f32")
+        self.index_path = os.path.join(root, f"{slug}.jsonl")
+        self.lock_path = os.path.join(root, f"{slug}.lock")
+        self.enabled = True
+        self.dim: Optional[int] = None
+        self._index: Dict[str, Tuple[str, int]] = {}
+        self._index_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(root, exist_ok=True)
+        except OSError as e:
+            self._disable(e)
+
+    def _disable(self, error: Exception) -> None:
+        if self.enabled:
+            logger.warning(f"Embedding store disabled ({self.root}): {error}")
+        self.enabled = False
+
+    # ---------- reads ----------
+    def _tail_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written line; read it next time
+                entry = json.loads(line)
+                self._index[entry["id"]] = (entry["hash"], entry["row"])
+                self.dim = entry.get("dim", self.dim)
+                self._index_offset += len(line.encode("utf-8"))
+
+    def _rows(self, needed: int) -> Optional[np.memmap]:
+        if self._vectors is None or len(self._vectors) < needed:
+            if not self.dim or not os.path.exists(self.vectors_path):
+                return None
+            rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._vectors
+
+    def lookup(self, record_ids: Sequence[str], hashes: Sequence[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """Returns ({position: embedding} for hits, [positions of misses])."""
+        if not self.enabled:
+            return {}, list(range(len(record_ids)))
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        try:
+            with self._lock:
+                if any(rid not in self._index for rid in record_ids):
+                    self._tail_index()
+                rows = [self._index.get(rid) for rid in record_ids]
+                top = max((entry[1] for entry in rows if entry), default=-1)
+                vectors = self._rows(top + 1) if top >= 0 else None
+            for i, (entry, h) in enumerate(zip(rows, hashes)):
+                if entry and entry[0] == h and vectors is not None and entry[1] < len(vectors):
+                    found[i] = np.asarray(vectors[entry[1]])
+                else:
+                    missing.append(i)
+        except Exception as e:
+            self._disable(e)
+            return {}, list(range(len(record_ids)))
+        return found, missing
+
+    # ---------- writes ----------
+    def put_many(self, record_ids: Sequence[str], hashes: Sequence[str], embeddings: np.ndarray) -> None:
+        if not self.enabled or not len(record_ids):
+            return
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        try:
+            with self._lock, open(self.lock_path, "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._tail_index()
+                if self.dim is None:
+                    self.dim = embeddings.shape[1]
+                size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+                first_row = size // (self.dim * 4)
+                # vectors first, then the index lines that point at them
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(first_row * self.dim * 4)  # drop a torn trailing row, if any
+                    f.write(embeddings.tobytes())
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    for offset, (rid, h) in enumerate(zip(record_ids, hashes)):
+                        f.write(json.dumps({"id": rid, "hash": h, "row": first_row + offset, "dim": self.dim}) + "\n")
+                self._tail_index()
+        except Exception as e:
+            self._disable(e)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+# -----------------------------
+# Offline backfill
+# -----------------------------
+# python -m validators.embedding_store backfill [--batch-size N]
+if __name__ == "__main__":
+    import argparse, asyncio
+
+    parser = argparse.ArgumentParser(description="Embedding store maintenance")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    from validators.pain_data_duplicates import backfill_embeddings
+    total = asyncio.run(backfill_embeddings(batch_size=args.batch_size))
+    logger.info(f"Backfill complete: {total} descriptions embedded")
@@ -3,10 +3,22 @@
 from fastapi import APIRouter, HTTPException, Request
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-from models.pain_data import PainData
-import os, re, logging
-from sentence_transformers import SentenceTransformer, util
-from rapidfuzz import fuzz
+from models.pain_data import PainSubmission
+from validators.embedding_batcher import EmbeddingBatcher
+from validators.embedding_store import EmbeddingStore, text_hash
+from validators.vector_index import PainHistoryIndex
+from validators.routine_state import RoutineState, RoutineStateCache
+from validators.embedding_backends import DEFAULT_EMBEDDING_BACKEND, get_embedding_backend, load_embedding_model
+from validators.text_matching import normalize_text, dynamic_threshold, fuzzy_similarities
+from utils.workers import pool_from_env
+from utils.registry import registry
+from utils.metrics import metrics, stage_timer, cache_family, log_event
+from utils.ingest import read_model
+from typing import Any, Dict, List, Optional
+from collections import Counter
+import asyncio
+import os, logging
+import numpy as np
 from datetime import datetime, timezone, timedelta
 
 # -----------------------------
@@ -26,114 +38,368 @@ DB_NAME = os.getenv("DB_NAME")
 PAINDATA_COLL = os.getenv("PAINDATA_COLL")
 EXERCISE_COLL = os.getenv("EXERCISES_COLL")
 
-if not all([MONGO_URI, DB_NAME, PAINDATA_COLL]):
-    raise RuntimeError("❌ Missing environment variables. Check your .env file.")
+def _connect_mongo():
+    # checked on first use, so the app (and tests) can import without a database
+    if not all([MONGO_URI, DB_NAME, PAINDATA_COLL]):
+        raise RuntimeError("❌ Missing environment variables. Check your .env file.")
+    return AsyncIOMotorClient(MONGO_URI)
 
-mongo_client = AsyncIOMotorClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-pain_data_collection = db[PAINDATA_COLL]
-exercise_collection = db[EXERCISE_COLL]
+# network clients must not be created before a preload fork (see serve.py)
+registry.register("mongo_async", _connect_mongo, close=lambda client: client.close(), fork_safe=False)
+
+def get_pain_data_collection():
+    return registry.get("mongo_async")[DB_NAME][PAINDATA_COLL]
+
+def get_exercise_collection():
+    return registry.get("mongo_async")[DB_NAME][EXERCISE_COLL]
 
 # -----------------------------
 # Load Semantic Model once
 # -----------------------------
-logger.info("Loading SentenceTransformer model (paraphrase-mpnet-base-v2)...")
-model = SentenceTransformer("paraphrase-mpnet-base-v2")
-logger.info("Model loaded successfully.")
+# EMBEDDING_BACKEND: mpnet (default), mpnet-int8, minilm or minilm-int8;
+# compare them with `python -m benchmarks.embedding_backends`
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", DEFAULT_EMBEDDING_BACKEND)
+MODEL_NAME = get_embedding_backend(EMBEDDING_BACKEND).store_name
+registry.register("embedding_model", lambda: load_embedding_model(EMBEDDING_BACKEND))
+
+def get_embedding_model():
+    return registry.get("embedding_model")
+
+def encode_normalized(texts: List[str]) -> np.ndarray:
+    # unit-length rows, so cosine similarity is a plain dot product
+    model = get_embedding_model()
+    with stage_timer("embedding"):
+        return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+# torch inference and rapidfuzz release the GIL, so a thread pool is enough
+duplicates_pool = pool_from_env("DUPLICATES")
+
+# concurrent duplicate checks share model invocations
+embedding_batcher = EmbeddingBatcher(
+    encode_normalized,
+    max_batch=int(os.getenv("EMBED_MAX_BATCH", "64")),
+    max_wait=float(os.getenv("EMBED_MAX_WAIT_MS", "5")) / 1000,
+    run=duplicates_pool.run
+)
+
+# stored descriptions never change, so their embeddings are computed once and
+# persisted (set EMBEDDING_STORE_DIR="" to disable)
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", ".embedding_store")
+embedding_store = EmbeddingStore(EMBEDDING_STORE_DIR, MODEL_NAME) if EMBEDDING_STORE_DIR else None
 
 # -----------------------------
 # Helper functions
 # -----------------------------
-def normalize_text(text: str) -> str:
-    text = re.sub(r"[^a-zA-Z\s]", "", text.lower().strip())
-    text = re.sub(r"\s+", " ", text)
-    return text
-
-def dynamic_threshold(desc: str) -> float:
-    word_count = len(desc.split())
-    if word_count <= 5:
-        return 0.70
-    elif word_count <= 10:
-        return 0.75
-    return 0.80
-
-def is_similar_description(desc1: str, desc2: str) -> bool:
-    if not desc1 or not desc2:
-        return False
-
-    desc1_norm, desc2_norm = normalize_text(desc1), normalize_text(desc2)
-    embeddings = model.encode([desc1_norm, desc2_norm])
-    semantic_sim = util.cos_sim(embeddings[0], embeddings[1]).item()
-    fuzzy_sim = fuzz.token_set_ratio(desc1_norm, desc2_norm) / 100
-    threshold = dynamic_threshold(desc1_norm)
-
-    logger.info(
-        f"Comparing:\n'{desc1_norm}' ↔ '{desc2_norm}' | "
-        f"semantic={semantic_sim:.2f}, fuzzy={fuzzy_sim:.2f}, threshold={threshold:.2f}"
-    )
-    return semantic_sim >= threshold or fuzzy_sim >= threshold
+async def embed_records(record_ids: Optional[List[str]], record_norms: List[str]) -> np.ndarray:
+    """
+    Embeddings of normalized stored descriptions, one row per record, taken
+    from the embedding store when record_ids are given; the rest are encoded
+    in one batched call.
+    """
+    hashes = [text_hash(norm) for norm in record_norms]
+    if embedding_store is not None and record_ids is not None:
+        stored, missing = embedding_store.lookup(record_ids, hashes)
+    else:
+        stored, missing = {}, list(range(len(record_norms)))
+
+    if missing:
+        encoded = await embedding_batcher.encode([record_norms[j] for j in missing])
+        dim = encoded.shape[1]
+    else:
+        # every record came from the store; nothing to encode
+        encoded = None
+        dim = len(next(iter(stored.values()))) if stored else (getattr(embedding_store, "dim", None) or 0)
+    embeddings = np.empty((len(record_norms), dim), dtype=np.float32)
+    for j, embedding in stored.items():
+        embeddings[j] = embedding
+    for row, j in enumerate(missing):
+        embeddings[j] = encoded[row]
+
+    if missing and embedding_store is not None and record_ids is not None:
+        await asyncio.to_thread(
+            embedding_store.put_many,
+            [record_ids[j] for j in missing], [hashes[j] for j in missing], encoded
+        )
+    return embeddings
 
 # -----------------------------
-# Endpoint
+# Per-user history index
 # -----------------------------
-@router.post("/")
-async def check_duplicates(request: Request):
-    logger.info("📩 Received request to check duplicates")
+# records the transformer scores per step of the cascade
+CASCADE_CHUNK = int(os.getenv("DUPLICATES_CASCADE_CHUNK", "32"))
+
+# how many records each stage of the cascade decided:
+#   exact / fuzzy / semantic : matched by that stage
+#   rejected                 : scored by the transformer, no match
+#   not_reached              : never looked at, an earlier match raised
+#   embedded                 : stored records the transformer had to encode
+cascade_counts: Counter = Counter()
+
+def cascade_stats() -> Dict[str, Any]:
+    stats = {key: cascade_counts[key] for key in ("checks", "exact", "fuzzy", "semantic", "rejected", "not_reached", "embedded")}
+    compared = stats["fuzzy"] + stats["semantic"] + stats["rejected"] + stats["not_reached"]
+    stats["transformer_skipped_ratio"] = round(1 - (stats["semantic"] + stats["rejected"]) / compared, 4) if compared else 0.0
+    return stats
+
+metrics.add_collector(lambda: [(
+    "ai_duplicate_cascade_total", "counter", "Records decided by each duplicate-check stage",
+    [({"stage": key}, value) for key, value in cascade_stats().items() if key != "transformer_skipped_ratio"]
+)])
+
+def _timed_fuzzy_similarities(new_norm: str, record_norms: List[str]) -> np.ndarray:
+    with stage_timer("fuzzy_match"):
+        return fuzzy_similarities(new_norm, record_norms)
+
+# createdAt comes from the clock of whichever API server saved the record, so
+# a record saved slightly later may be older than the last one indexed;
+# re-read this many seconds behind it
+INDEX_SYNC_OVERLAP = int(os.getenv("VECTOR_INDEX_SYNC_OVERLAP", "60"))
+
+# only what the checks read; never the doctorSlip image
+PAIN_HISTORY_PROJECTION = {"description": 1, "createdAt": 1, "normalizedInjuryPlace": 1, "injuryPlace": 1}
+
+async def _fetch_new_records(user_email: str, injury: str, since: Optional[datetime]) -> List[dict]:
+    # served by the (userEmail, normalizedInjuryPlace, createdAt) index; records
+    # saved before normalizedInjuryPlace existed are matched on injuryPlace
+    # until `python -m validators.pain_data_duplicates backfill-injury-places` has run
+    query = {"userEmail": user_email, "normalizedInjuryPlace": {"$in": [injury, None]}}
+    if since is not None:
+        query["createdAt"] = {"$gte": since - timedelta(seconds=INDEX_SYNC_OVERLAP)}
+    cursor = get_pain_data_collection().find(query, PAIN_HISTORY_PROJECTION).sort("createdAt", -1)
+    records = await cursor.to_list(length=None)
+    return [
+        r for r in records
+        if r.get("normalizedInjuryPlace") is not None or normalize_text(r.get("injuryPlace", "")) == injury
+    ]
+
+pain_history_index = PainHistoryIndex(
+    fetch_new=_fetch_new_records,
+    embed=embed_records,
+    normalize=normalize_text,
+    threshold=dynamic_threshold,
+    max_users=int(os.getenv("VECTOR_INDEX_MAX_USERS", "1024"))
+)
+
+async def backfill_embeddings(batch_size: int = 256) -> int:
+    """Embeds every stored description missing from the embedding store; returns how many were added."""
+    if embedding_store is None:
+        raise RuntimeError("EMBEDDING_STORE_DIR is not configured")
+
+    added = 0
+    cursor = get_pain_data_collection().find({"description": {"$nin": [None, ""]}}, {"description": 1})
+    while True:
+        records = await cursor.to_list(length=batch_size)
+        if not records:
+            break
+        ids = [str(r["_id"]) for r in records]
+        norms = [normalize_text(r["description"]) for r in records]
+        hashes = [text_hash(norm) for norm in norms]
+        _, missing = embedding_store.lookup(ids, hashes)
+        if missing:
+            embeddings = await asyncio.to_thread(encode_normalized, [norms[j] for j in missing])
+            embedding_store.put_many([ids[j] for j in missing], [hashes[j] for j in missing], embeddings)
+            added += len(missing)
+        logger.info(f"Backfill progress: {added} embedded")
+    return added
+
+# -----------------------------
+# Per-user routine state
+# -----------------------------
+# The overlap check reads each matched record's linked exercise routine
+# (progressPercent, updatedAt). Users keep re-submitting while a routine is in
+# progress, so states are cached per user and loaded in bulk: the first lookup
+# also loads the user's newest ROUTINE_STATE_PREFETCH records.
+#
+# Staleness: with a change stream on the exercises collection (a replica set),
+# changes invalidate entries as they happen. Without one, entries expire:
+# - routines ongoing when loaded after ROUTINE_STATE_ONGOING_MAX_AGE seconds.
+#   Finishing a routine bumps its updatedAt, which keeps it "ongoing" for
+#   another ROUTINE_RECENT_HOURS, so within that window only deleting the
+#   routine can turn a cached rejection into a wrong one;
+# - other states (finished, or no routine yet) after ROUTINE_STATE_MAX_AGE.
+# Writers that cannot be watched call POST /ai/checkDuplicates/routineState/invalidate.
+ROUTINE_RECENT_HOURS = 2
+ROUTINE_STATE_PREFETCH = int(os.getenv("ROUTINE_STATE_PREFETCH", "256"))
+ROUTINE_STATE_WATCH = os.getenv("ROUTINE_STATE_WATCH", "1") == "1"
+
+# only what the overlap check reads
+ROUTINE_PROJECTION = {"painDataId": 1, "progressPercent": 1, "updatedAt": 1}
+
+async def _fetch_routine_states(pain_data_ids: List[Any]) -> Dict[Any, RoutineState]:
+    # served by the painDataId index; a record with several routines keeps the first
+    cursor = get_exercise_collection().find({"painDataId": {"$in": pain_data_ids}}, ROUTINE_PROJECTION)
+    states: Dict[Any, RoutineState] = {}
+    for exercise in await cursor.to_list(length=None):
+        states.setdefault(
+            exercise["painDataId"],
+            RoutineState(exercise.get("progressPercent", 0), exercise.get("updatedAt"))
+        )
+    return states
+
+def routine_ongoing(routine: RoutineState, now: datetime) -> bool:
+    hours_diff = 999
+    if routine.updated_at:
+        hours_diff = (now - routine.updated_at.replace(tzinfo=timezone.utc)).total_seconds() / 3600
+    return routine.progress < 100 or hours_diff < ROUTINE_RECENT_HOURS
+
+routine_states = RoutineStateCache(
+    fetch=_fetch_routine_states,
+    ongoing=lambda routine: routine_ongoing(routine, datetime.now(timezone.utc)),
+    max_age=float(os.getenv("ROUTINE_STATE_MAX_AGE", "30")),
+    # capped by the window that keeps the verdict valid
+    ongoing_max_age=min(float(os.getenv("ROUTINE_STATE_ONGOING_MAX_AGE", "600")), ROUTINE_RECENT_HOURS * 3600),
+    watched_max_age=float(os.getenv("ROUTINE_STATE_WATCHED_MAX_AGE", "3600")),
+    max_users=int(os.getenv("ROUTINE_STATE_MAX_USERS", "1024"))
+)
+metrics.add_collector(lambda: [cache_family("routine_state", routine_states.info())])
 
-    try:
-        body = await request.json()
-        data = PainData(**body)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid data format: {e}")
+def start_routine_watch() -> None:
+    if ROUTINE_STATE_WATCH:
+        routine_states.start_watching(get_exercise_collection)
 
+# -----------------------------
+# Duplicate check
+# -----------------------------
+async def run_duplicate_check(data: PainSubmission, normalized_desc: Optional[str] = None) -> None:
+    """Raises HTTPException(409) with a matchedPainDataId header if the entry duplicates or overlaps an existing one."""
     user_email = data.userEmail.lower().strip()
     normalized_injury = normalize_text(data.injuryPlace)
-    normalized_desc = normalize_text(data.description or "")
+    if normalized_desc is None:
+        normalized_desc = normalize_text(data.description or "")
+
+    cascade_counts["checks"] += 1
+    with stage_timer("history_sync"):
+        partition = await pain_history_index.sync(user_email, normalized_injury)
+    index = partition.index
+
+    # ✅ Step 1: Direct duplicates (newest matching record)
+    duplicate_id = partition.latest(normalized_desc)
+    if duplicate_id is not None:
+        cascade_counts["exact"] += 1
+        raise HTTPException(
+            status_code=409,
+            detail="Duplicate pain data entry found (same injury & description).",
+            headers={"matchedPainDataId": str(duplicate_id)}
+        )
+    if not data.description or not len(index):
+        return
+
+    # ✅ Step 2: Doctor-like logic (smart check)
+    # cascade: one rapidfuzz pass decides fuzzy matches for every record; the
+    # transformer only scores the records fuzzy left undecided, newest first,
+    # one chunk at a time, and stops as soon as a match raises
+    fuzzy = await duplicates_pool.run(_timed_fuzzy_similarities, normalized_desc, index.texts)
+    fuzzy_hits = fuzzy >= index.thresholds
+    order = index.newest_first()
+    new_embedding = None
+    now = datetime.now(timezone.utc)
+    prefetch = [index.ids[pos] for pos in order[:ROUTINE_STATE_PREFETCH]]
+
+    for start in range(0, len(order), CASCADE_CHUNK):
+        chunk = order[start:start + CASCADE_CHUNK]
+        undecided = [int(pos) for pos in chunk if not fuzzy_hits[pos]]
+        semantic_hits = set()
+        if undecided:
+            if new_embedding is None:
+                encoded, embedded = await asyncio.gather(
+                    embedding_batcher.encode([normalized_desc]),
+                    pain_history_index.ensure_vectors(partition, undecided)
+                )
+                new_embedding = encoded[0]
+            else:
+                embedded = await pain_history_index.ensure_vectors(partition, undecided)
+            cascade_counts["embedded"] += embedded
+            sims = index.similarities(new_embedding, undecided)
+            semantic_hits = {pos for pos, sim in zip(undecided, sims) if sim >= index.thresholds[pos]}
+            cascade_counts["semantic"] += len(semantic_hits)
+            cascade_counts["rejected"] += len(undecided) - len(semantic_hits)
+        matched = [int(pos) for pos in chunk if fuzzy_hits[pos] or pos in semantic_hits]
+        cascade_counts["fuzzy"] += len(chunk) - len(undecided)
+        if not matched:
+            continue
+
+        # 🧩 Exercise progress for this chunk's matches, usually from memory
+        with stage_timer("routine_state"):
+            routines = await routine_states.get(user_email, [index.ids[pos] for pos in matched], prefetch)
 
-    all_records = await pain_data_collection.find({"userEmail": user_email}).to_list(length=500)
-    filtered_records = [r for r in all_records if normalize_text(r.get("injuryPlace", "")) == normalized_injury]
+        try:
+            for pos in matched:
+                _check_overlap(index.ids[pos], index.created_at[pos], routines.get(index.ids[pos]), now)
+        except HTTPException:
+            cascade_counts["not_reached"] += len(order) - start - len(chunk)
+            raise
 
-    # ✅ Step 1: Direct duplicates
-    for record in filtered_records:
-        if normalize_text(record.get("description") or "") == normalized_desc:
+def _check_overlap(record_id: Any, record_time: Optional[datetime], routine: Optional[RoutineState], now: datetime) -> None:
+    if record_time:
+        record_time = record_time.replace(tzinfo=timezone.utc)
+        days_diff = (now - record_time).days
+
+        if days_diff < 7:
             raise HTTPException(
                 status_code=409,
-                detail="Duplicate pain data entry found (same injury & description).",
-                headers={"matchedPainDataId": str(record["_id"])}
+                detail=f"This pain seems too recent ({days_diff} days ago). Try updating your exercises instead.",
+                headers={"matchedPainDataId": str(record_id)}
             )
 
-    # ✅ Step 2: Doctor-like logic (smart check)
-    for record in filtered_records:
-        desc = record.get("description") or ""
-        if is_similar_description(desc, data.description or ""):
-            record_time = record.get("createdAt")
-            if record_time:
-                record_time = record_time.replace(tzinfo=timezone.utc)
-                days_diff = (datetime.now(timezone.utc) - record_time).days
-
-                if days_diff < 7:
-                    raise HTTPException(
-                        status_code=409,
-                        detail=f"This pain seems too recent ({days_diff} days ago). Try updating your exercises instead.",
-                        headers={"matchedPainDataId": str(record["_id"])}
-                    )
-
-            # 🧩 Fetch exercise progress for this pain data
-            linked_exercise = await exercise_collection.find_one({"painDataId": record["_id"]})
-            if linked_exercise:
-                progress = linked_exercise.get("progressPercent", 0)
-                updated_at = linked_exercise.get("updatedAt")
-                hours_diff = 999
-                if updated_at:
-                    updated_at = updated_at.replace(tzinfo=timezone.utc)
-                    hours_diff = (datetime.now(timezone.utc) - updated_at).total_seconds() / 3600
-
-                if progress < 100 or hours_diff < 2:
-                    raise HTTPException(
-                        status_code=409,
-                        detail="Exercise routine for this pain is still ongoing. Please complete it before logging new pain data.",
-                        headers={"matchedPainDataId": str(record["_id"])}
-                    )
-
-    logger.info("✅ No duplicates or ongoing pains found.")
+    if routine is not None:
+        if routine_ongoing(routine, now):
+            raise HTTPException(
+                status_code=409,
+                detail="Exercise routine for this pain is still ongoing. Please complete it before logging new pain data.",
+                headers={"matchedPainDataId": str(record_id)}
+            )
+
+async def backfill_injury_places() -> int:
+    """Sets normalizedInjuryPlace on records saved before the field existed; returns how many were updated."""
+    updated = 0
+    missing = {"normalizedInjuryPlace": {"$exists": False}}
+    for injury_place in await get_pain_data_collection().distinct("injuryPlace", missing):
+        result = await get_pain_data_collection().update_many(
+            {**missing, "injuryPlace": injury_place},
+            {"$set": {"normalizedInjuryPlace": normalize_text(injury_place or "")}}
+        )
+        updated += result.modified_count
+    return updated
+
+# -----------------------------
+# Endpoint
+# -----------------------------
+@router.post("/")
+async def check_duplicates(request: Request):
+    data = await read_model(request, PainSubmission)
+    await run_duplicate_check(data)
+
+    log_event(logger, "no_duplicates")
     return {"valid": True, "message": "No duplicate or overlapping pain entries detected."}
+
+@router.get("/stats")
+async def duplicate_check_stats():
+    return {**cascade_stats(), "routineState": routine_states.info()}
+
+@router.post("/routineState/invalidate")
+async def invalidate_routine_state(painDataId: Optional[str] = None, userEmail: Optional[str] = None):
+    """
+    For writers of exercise progress when no change stream is available: drops
+    the cached routine state of one pain record, of one user, or (neither
+    given) of everyone.
+    """
+    routine_states.invalidate(
+        user_email=userEmail.lower().strip() if userEmail else None,
+        pain_data_id=painDataId
+    )
+    return {"invalidated": True, **routine_states.bounds()}
+
+
+# -----------------------------
+# Maintenance
+# -----------------------------
+# python -m validators.pain_data_duplicates backfill-injury-places
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pain data maintenance")
+    parser.add_argument("command", choices=["backfill-injury-places"])
+    args = parser.parse_args()
+
+    total = asyncio.run(backfill_injury_places())
+    logger.info(f"Backfill complete: {total} pain records updated")
@@ -0,0 +1,120 @@
+# validators/pain_data_intake.py
+
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.responses import ORJSONResponse
+from models.pain_data import PainSubmission
+from validators.pain_data_validation import is_valid_description, validation_pool
+from validators.pain_data_duplicates import run_duplicate_check
+from validators.text_matching import normalize_text
+from recommender.recommender import recommend_exercises, catalog_version
+from recommender.recommend_router import to_inner_exercises, INNER_EXERCISE_FIELDS, ImageMode, DEFAULT_IMAGE_MODE
+from utils.metrics import log_event
+from utils.ingest import read_model
+from typing import Any, Dict
+import time, asyncio, logging
+
+# -----------------------------
+# Setup logging
+# -----------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("PainData Intake")
+
+router = APIRouter(prefix="/ai/intake", tags=["PainData Intake"])
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+async def _validation_stage(description: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    valid = bool(description) and await validation_pool.run(is_valid_description, description)
+    return {
+        "passed": valid,
+        "status": 200 if valid else 400,
+        "detail": "Description is valid" if valid else "Invalid description — must be a meaningful English sentence",
+        "ms": _elapsed_ms(start),
+    }
+
+async def _duplicates_stage(data: PainSubmission, normalized_desc: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        await run_duplicate_check(data, normalized_desc=normalized_desc)
+    except HTTPException as e:
+        if e.status_code != 409:
+            raise
+        return {
+            "passed": False,
+            "status": 409,
+            "detail": e.detail,
+            "matchedPainDataId": (e.headers or {}).get("matchedPainDataId"),
+            "ms": _elapsed_ms(start),
+        }
+    return {
+        "passed": True,
+        "status": 200,
+        "detail": "No duplicate or overlapping pain entries detected.",
+        "ms": _elapsed_ms(start),
+    }
+
+# -----------------------------
+# Endpoint
+# -----------------------------
+@router.post("/")
+async def intake_pain_data(
+    request: Request,
+    imageMode: ImageMode = Query(DEFAULT_IMAGE_MODE),
+    recommend: bool = Query(True, description="Recommend exercises when the submission passes")
+):
+    """
+    One call per submission: description validation and the duplicate check run
+    concurrently, and exercises are recommended only if both pass (and
+    `recommend` is set; callers that only validate pass recommend=false).
+    Responds 200 with the full verdict, or with the failing stage's status
+    (400 invalid description, 409 duplicate) and the same verdict body, so
+    callers can keep reading `detail` and the matchedPainDataId header.
+    """
+    started = time.perf_counter()
+    data = await read_model(request, PainSubmission)
+    parse_ms = _elapsed_ms(started)
+
+    description = (data.description or "").strip()
+    validation, duplicates = await asyncio.gather(
+        _validation_stage(description),
+        _duplicates_stage(data, normalize_text(description))
+    )
+
+    verdict: Dict[str, Any] = {
+        "valid": validation["passed"] and duplicates["passed"],
+        "validation": validation,
+        "duplicates": duplicates,
+        "recommendation": None,
+    }
+    timings = {"parse_ms": parse_ms, "validation_ms": validation["ms"], "duplicates_ms": duplicates["ms"]}
+
+    if verdict["valid"] and recommend:
+        start = time.perf_counter()
+        exercises = recommend_exercises(
+            injury_place=data.injuryPlace,
+            pain_level=data.painLevel,
+            pain_type=data.painType,
+            copy=False,
+            fields=INNER_EXERCISE_FIELDS
+        )
+        verdict["recommendation"] = {
+            "exercises": to_inner_exercises(exercises, imageMode),
+            "progress": 0.0,
+            "catalogVersion": catalog_version(),
+        }
+        timings["recommendation_ms"] = _elapsed_ms(start)
+
+    timings["total_ms"] = _elapsed_ms(started)
+    verdict["timings"] = timings
+
+    failed = validation if not validation["passed"] else duplicates if not duplicates["passed"] else None
+    if failed is None:
+        verdict["detail"] = "Pain data accepted"
+        return ORJSONResponse(verdict)
+
+    log_event(logger, "intake_rejected", status=failed["status"], total_ms=timings["total_ms"])
+    verdict["detail"] = failed["detail"]
+    headers = {"matchedPainDataId": failed["matchedPainDataId"]} if failed.get("matchedPainDataId") else None
+    return ORJSONResponse(status_code=failed["status"], content=verdict, headers=headers)
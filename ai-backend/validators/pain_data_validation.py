@@ -2,8 +2,12 @@
 
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-import re, spacy, logging
-from spellchecker import SpellChecker
+import os, re, logging
+from functools import lru_cache
+from utils.workers import pool_from_env
+from utils.registry import registry
+from utils.metrics import metrics, stage_timer, cache_family, log_event
+from utils.ingest import read_json
 
 # -----------------------------
 # Setup logging
@@ -16,7 +20,28 @@ router = APIRouter(prefix="/ai/validate", tags=["PainData Validation"])
 # -----------------------------
 # Load SpaCy model
 # -----------------------------
-nlp = spacy.load("en_core_web_sm")
+# Only part-of-speech tags are used. pos_ comes from the tagger plus the
+# attribute_ruler (which maps tag_ -> pos_), both fed by tok2vec; the parser,
+# NER and lemmatizer are never loaded.
+SPACY_EXCLUDE = ["parser", "ner", "lemmatizer", "senter"]
+
+def _load_spacy():
+    import spacy
+    return spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDE)
+
+def _load_spell_checker():
+    from spellchecker import SpellChecker
+    return SpellChecker(distance=1)  # distance=1 allows small typos
+
+# loaded on first use (or preloaded, see utils/registry.py)
+registry.register("spacy", _load_spacy)
+registry.register("spellchecker", _load_spell_checker)
+
+def get_nlp():
+    return registry.get("spacy")
+
+def get_spell():
+    return registry.get("spellchecker")
 
 # -----------------------------
 # Pydantic model
@@ -41,7 +66,14 @@ def is_real_word(token_text: str) -> bool:
     token_text = token_text.lower()
     return token_text.isalpha() and token_text not in STOP_WORDS
 
-spell = SpellChecker(distance=1)  # distance=1 allows small typos
+@lru_cache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "50000")))
+def is_dictionary_word(token: str) -> bool:
+    # exact dictionary hit first; the edit-distance candidate search only runs for unknown words
+    spell = get_spell()
+    if token in spell:
+        return True
+    candidates = spell.candidates(token)
+    return candidates is not None and len(candidates) > 0
 
 def is_valid_description(text: str) -> bool:
     """
@@ -60,54 +92,67 @@ def is_valid_description(text: str) -> bool:
     if len(tokens) < 1:
         return False
 
-    # Check dictionary words ratio
+    # Need at least 2 dictionary words; stop looking once we have them
     correct_words = 0
-    for token in tokens:
-        candidates = spell.candidates(token)
-        if token in spell or (candidates is not None and len(candidates) > 0):
-            correct_words += 1
+    with stage_timer("spell_check"):
+        for token in tokens:
+            if is_dictionary_word(token):
+                correct_words += 1
+                if correct_words >= 2:
+                    break
 
     # Reject if fewer than 2 dictionary words
     if correct_words < 2:
         return False
 
-    # Also parse with SpaCy to check for verbs/nouns
-    doc = nlp(text)
-    has_verb_or_noun = any(tok.pos_ in ("VERB", "NOUN", "PROPN") for tok in doc)
+    # Also tag with SpaCy to check for verbs/nouns
+    with stage_timer("spacy"):
+        doc = get_nlp()(text)
+    return any(tok.pos_ in ("VERB", "NOUN", "PROPN") for tok in doc)
+
+# -----------------------------
+# Execution pool
+# -----------------------------
+def preload_models():
+    # process-pool initializer: load spaCy and the spell checker and run them
+    # once, so the first real request is warm
+    get_nlp()("warm up")
+    get_spell().candidates("warm")
+
+# spaCy and pyspellchecker hold the GIL; set VALIDATION_EXECUTOR=process to run
+# them in preloaded worker processes instead of threads
+validation_pool = pool_from_env("VALIDATION", initializer=preload_models)
 
-    # Accept only if at least 2 dictionary words AND has a verb/noun
-    return correct_words >= 2 and has_verb_or_noun
+def _token_cache_info():
+    info = is_dictionary_word.cache_info()
+    return {"hits": info.hits, "misses": info.misses}
+
+# with VALIDATION_EXECUTOR=process these only cover work done in this process
+metrics.add_collector(lambda: [cache_family("dictionary_tokens", _token_cache_info())])
 
 # -----------------------------
 # Endpoint
 # -----------------------------
 @router.post("/")
 async def validate_pain_data(request: Request):
-    logger.info("📩 Received request to validate pain data")
-    try:
-        body = await request.json()
-        logger.info(f"Received body: {body}")
-    except Exception as e:
-        logger.error(f"Failed to parse JSON body: {e}")
-        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    body = await read_json(request)
 
     # Validate Pydantic model
     try:
         data = PainData(**body)
-        logger.info(f"Pydantic validation passed: {data}")
     except Exception as e:
-        logger.error(f"Pydantic validation failed: {e}")
+        log_event(logger, "invalid_payload", level=logging.WARNING, sample_rate=1.0, error=type(e).__name__)
         raise HTTPException(status_code=400, detail=f"Invalid data format: {str(e)}")
 
     # -----------------------------
     # Description validation only
     # -----------------------------
-    if not is_valid_description(data.description):
-        logger.warning(f"Invalid description: {data.description}")
+    if not await validation_pool.run(is_valid_description, data.description):
+        log_event(logger, "invalid_description", descriptionLength=len(data.description))
         raise HTTPException(
             status_code=400,
             detail="Invalid description — must be a meaningful English sentence"
         )
 
-    logger.info("Validation complete: Description is valid")
+    log_event(logger, "valid_description", descriptionLength=len(data.description))
     return {"valid": True, "message": "Description is valid"}
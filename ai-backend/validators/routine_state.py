@@ -0,0 +1,234 @@
+# validators/routine_state.py
+import asyncio, logging, time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger("Routine State")
+
+# MongoDB's "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+class RoutineState(NamedTuple):
+    """The exercise routine linked to a pain record, as the "still ongoing" check reads it."""
+    progress: Any
+    updated_at: Any
+
+class _Fetch:
+    """A bulk load in flight: which of its ids were invalidated before it returned."""
+    __slots__ = ("user_email", "ids", "stale", "all_stale")
+
+    def __init__(self, user_email: str, ids: List[Any]):
+        self.user_email = user_email
+        self.ids = {str(i) for i in ids}
+        self.stale: Set[str] = set()
+        self.all_stale = False
+
+class RoutineStateCache:
+    """
+    Per-user cache of painDataId -> RoutineState (None: no linked routine).
+
+    fetch(ids) loads the states of many pain records in one query and returns
+    {painDataId: RoutineState} for those that have a routine. get() serves
+    what is cached and fresh, and fetches the rest in one call together with
+    the `prefetch` ids that are not cached either (the rest of the user's
+    history), so a user's next checks are answered from memory.
+
+    Staleness: an entry is served for max_age seconds after it was loaded,
+    or ongoing_max_age when ongoing(state) held at load time (a routine
+    still in progress; see pain_data_duplicates for why those verdicts can
+    be trusted longer). While a change stream on the exercises collection is
+    live (start_watching), changes invalidate entries as they happen and
+    every entry is served for watched_max_age instead. invalidate() is the
+    explicit hook for writers that cannot be watched (standalone mongod,
+    local stand-ins); it only discards the entries, and the results of loads
+    in flight, for the ids or user it names. bounds() reports the bounds
+    currently in force.
+    At most max_users users are kept in memory (least recently used first out).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[Any]], Awaitable[Dict[Any, RoutineState]]],
+        ongoing: Callable[[RoutineState], bool],
+        max_age: float = 30.0,
+        ongoing_max_age: float = 600.0,
+        watched_max_age: float = 3600.0,
+        max_users: int = 1024,
+        retry_interval: float = 30.0
+    ):
+        self.fetch = fetch
+        self.ongoing = ongoing
+        self.max_age = max_age
+        self.ongoing_max_age = ongoing_max_age
+        self.watched_max_age = watched_max_age
+        self.max_users = max_users
+        self.retry_interval = retry_interval
+        # user -> {painDataId: (state, expires_at)}
+        self._users: "OrderedDict[str, Dict[Any, Tuple[Optional[RoutineState], float]]]" = OrderedDict()
+        # str(painDataId) -> user, to invalidate by id (change events and hook callers may use either type)
+        self._owner: Dict[str, str] = {}
+        # loads in flight; an invalidation marks the ids it touches in them,
+        # so those (and only those) results are not cached
+        self._fetches: Set[_Fetch] = set()
+        self.watching = False
+        self._watcher: Optional[asyncio.Task] = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _entries(self, user_email: str) -> Dict[Any, Tuple[Optional[RoutineState], float]]:
+        entries = self._users.get(user_email)
+        if entries is None:
+            entries = self._users[user_email] = {}
+            while len(self._users) > self.max_users:
+                _, evicted = self._users.popitem(last=False)
+                for pain_data_id in evicted:
+                    self._owner.pop(str(pain_data_id), None)
+                self.evictions += 1
+        else:
+            self._users.move_to_end(user_email)
+        return entries
+
+    def _expires_at(self, state: Optional[RoutineState], loaded_at: float) -> float:
+        if self.watching:
+            return loaded_at + self.watched_max_age
+        return loaded_at + (self.ongoing_max_age if state is not None and self.ongoing(state) else self.max_age)
+
+    async def get(self, user_email: str, ids: List[Any], prefetch: Iterable[Any] = ()) -> Dict[Any, Optional[RoutineState]]:
+        now = time.monotonic()
+        entries = self._entries(user_email)
+        states: Dict[Any, Optional[RoutineState]] = {}
+        missing = []
+        for pain_data_id in ids:
+            entry = entries.get(pain_data_id)
+            if entry is not None and now < entry[1]:
+                states[pain_data_id] = entry[0]
+            else:
+                missing.append(pain_data_id)
+        self.hits += len(states)
+        self.misses += len(missing)
+        if not missing:
+            return states
+
+        wanted = set(missing)
+        load = missing + [
+            i for i in dict.fromkeys(prefetch)
+            if i not in wanted and not (i in entries and now < entries[i][1])
+        ]
+        pending = _Fetch(user_email, load)
+        self._fetches.add(pending)
+        try:
+            fetched = await self.fetch(load)
+        finally:
+            self._fetches.discard(pending)
+        for pain_data_id in missing:
+            states[pain_data_id] = fetched.get(pain_data_id)
+
+        # an invalidation that arrived during the fetch may postdate what it read
+        if not pending.all_stale:
+            entries = self._entries(user_email)
+            for pain_data_id in load:
+                if str(pain_data_id) in pending.stale:
+                    continue
+                state = fetched.get(pain_data_id)
+                entries[pain_data_id] = (state, self._expires_at(state, now))
+                self._owner[str(pain_data_id)] = user_email
+        return states
+
+    def invalidate(self, user_email: Optional[str] = None, pain_data_id: Any = None) -> None:
+        """Drops one record's state, one user's, or (neither given) everything."""
+        self.invalidations += 1
+        for pending in self._fetches:
+            if pain_data_id is not None:
+                if str(pain_data_id) in pending.ids:
+                    pending.stale.add(str(pain_data_id))
+            elif user_email is None or pending.user_email == user_email:
+                pending.all_stale = True
+
+        if pain_data_id is not None:
+            owner = self._owner.pop(str(pain_data_id), None)
+            entries = self._users.get(owner) if owner is not None else None
+            if entries is not None:
+                for key in [k for k in entries if str(k) == str(pain_data_id)]:
+                    del entries[key]
+        elif user_email is not None:
+            for key in self._users.pop(user_email, {}):
+                self._owner.pop(str(key), None)
+        else:
+            self._users.clear()
+            self._owner.clear()
+
+    def bounds(self) -> Dict[str, Any]:
+        """How stale a served state can be right now, in seconds."""
+        if self.watching:
+            return {"watching": True, "maxAge": self.watched_max_age, "ongoingMaxAge": self.watched_max_age}
+        return {"watching": False, "maxAge": self.max_age, "ongoingMaxAge": self.ongoing_max_age}
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "entries": len(self._owner),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            **self.bounds()
+        }
+
+    # ---------- change stream ----------
+    def start_watching(self, collection: Callable[[], Any]) -> None:
+        """Invalidates entries from a change stream on collection() until stop_watching(); needs a running loop."""
+        if self._watcher is None:
+            self._watcher = asyncio.get_running_loop().create_task(self._watch(collection))
+
+    async def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def _set_watching(self, watching: bool) -> None:
+        # entries loaded under the other bound (or while events could be
+        # missed) must not outlive the switch
+        self.watching = watching
+        self.invalidate()
+
+    async def _watch(self, collection: Callable[[], Any]) -> None:
+        try:
+            exercises = collection()
+        except Exception as e:
+            logger.warning(f"Routine state change stream not started: {e}")
+            return
+        if not hasattr(exercises, "watch"):
+            logger.info("Exercises collection has no change streams; routine states expire by age only")
+            return
+
+        while True:
+            try:
+                async with exercises.watch(full_document="updateLookup") as stream:
+                    self._set_watching(True)
+                    logger.info("Watching exercise routine changes")
+                    async for change in stream:
+                        self._apply(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if getattr(e, "code", None) == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("MongoDB has no change streams (not a replica set); routine states expire by age only")
+                    return
+                logger.warning(f"Routine state change stream failed, retrying in {self.retry_interval}s: {e}")
+            finally:
+                if self.watching:
+                    self._set_watching(False)
+            await asyncio.sleep(self.retry_interval)
+
+    def _apply(self, change: Dict[str, Any]) -> None:
+        document = change.get("fullDocument") or {}
+        moved = "painDataId" in ((change.get("updateDescription") or {}).get("updatedFields") or {})
+        if "painDataId" in document and not moved:
+            self.invalidate(pain_data_id=document["painDataId"])
+        else:
+            # deletes (and updates of since-deleted or re-linked routines)
+            # do not say which pain record lost its routine
+            self.invalidate()
@@ -0,0 +1,28 @@
+# validators/text_matching.py
+#
+# Text rules of the duplicate check, kept free of model and database imports
+# so offline tools (benchmarks/embedding_backends.py) can reuse them.
+import re
+from typing import List
+import numpy as np
+from rapidfuzz import fuzz, process
+
+def normalize_text(text: str) -> str:
+    text = re.sub(r"[^a-zA-Z\s]", "", text.lower().strip())
+    text = re.sub(r"\s+", " ", text)
+    return text
+
+def dynamic_threshold(desc: str) -> float:
+    word_count = len(desc.split())
+    if word_count <= 5:
+        return 0.70
+    elif word_count <= 10:
+        return 0.75
+    return 0.80
+
+def fuzzy_similarity(record_norm: str, new_norm: str) -> float:
+    return fuzz.token_set_ratio(record_norm, new_norm) / 100
+
+def fuzzy_similarities(new_norm: str, record_norms: List[str]) -> np.ndarray:
+    """fuzzy_similarity() of new_norm against every record, in one rapidfuzz pass."""
+    return process.cdist([new_norm], record_norms, scorer=fuzz.token_set_ratio, dtype=np.float64)[0] / 100
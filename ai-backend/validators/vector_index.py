@@ -0,0 +1,194 @@
+# validators/vector_index.py
+import asyncio, logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from datetime import datetime, timezone
+
+logger = logging.getLogger("Vector Index")
+
+class VectorIndex:
+    """
+    Flat inner-product index over unit-length embeddings, append-only and kept
+    in insertion order. Rows are added without embeddings; fill() attaches
+    them later, so only rows that are actually compared ever get embedded.
+    Each row also carries the record id, normalized text, the per-record
+    semantic threshold and the record's createdAt.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.ids: List[Any] = []
+        self.texts: List[str] = []
+        self.created_at: List[Any] = []
+        self._capacity = capacity
+        self._thresholds = np.empty(capacity, dtype=np.float64)
+        self._created_keys = np.empty(capacity, dtype=np.float64)
+        self._present = np.zeros(capacity, dtype=bool)
+        self._vectors: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def thresholds(self) -> np.ndarray:
+        return self._thresholds[:len(self.ids)]
+
+    def _resize(self, array: np.ndarray, fill: Any = None) -> np.ndarray:
+        grown = np.empty((self._capacity,) + array.shape[1:], dtype=array.dtype)
+        if fill is not None:
+            grown.fill(fill)
+        grown[:len(self.ids)] = array[:len(self.ids)]
+        return grown
+
+    def add(self, ids: List[Any], texts: List[str], created_at: List[Any], thresholds: List[float]) -> None:
+        if not ids:
+            return
+        start, end = len(self.ids), len(self.ids) + len(ids)
+        if end > self._capacity:
+            while self._capacity < end:
+                self._capacity *= 2
+            self._thresholds = self._resize(self._thresholds)
+            self._created_keys = self._resize(self._created_keys)
+            self._present = self._resize(self._present, fill=False)
+            if self._vectors is not None:
+                self._vectors = self._resize(self._vectors)
+        self._thresholds[start:end] = thresholds
+        # records without createdAt sort last
+        self._created_keys[start:end] = [
+            c.replace(tzinfo=c.tzinfo or timezone.utc).timestamp() if c is not None else -np.inf
+            for c in created_at
+        ]
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.created_at.extend(created_at)
+        self._order = None
+
+    def missing(self, positions: Iterable[int]) -> List[int]:
+        return [int(p) for p in positions if not self._present[p]]
+
+    def fill(self, positions: List[int], vectors: np.ndarray) -> None:
+        if not positions:
+            return
+        if self._vectors is None:
+            self._vectors = np.empty((self._capacity, vectors.shape[1]), dtype=np.float32)
+        self._vectors[positions] = vectors
+        self._present[positions] = True
+
+    def similarities(self, query: np.ndarray, positions: List[int]) -> np.ndarray:
+        """Inner products with the given rows, which must all have been filled."""
+        if not positions:
+            return np.zeros(0, dtype=np.float32)
+        return self._vectors[positions] @ query
+
+    def newest_first(self) -> np.ndarray:
+        """All positions by createdAt, most recent first; equal timestamps keep insertion order."""
+        if self._order is None:
+            self._order = np.argsort(-self._created_keys[:len(self.ids)], kind="stable")
+        return self._order
+
+
+class _Partition:
+    """Indexed pain records of one user for one normalized injury place."""
+
+    def __init__(self):
+        self.high_water: Optional[datetime] = None
+        self.seen: Set[Any] = set()
+        self.lock = asyncio.Lock()
+        self.index = VectorIndex()
+        # normalized description -> (createdAt, id) of its newest record
+        # (blank descriptions included, they are never compared semantically)
+        self.latest_by_text: Dict[str, Tuple[Any, Any]] = {}
+
+    def latest(self, text: str) -> Optional[Any]:
+        entry = self.latest_by_text.get(text)
+        return entry[1] if entry else None
+
+
+class PainHistoryIndex:
+    """
+    Vector indexes of stored pain descriptions, one per (user, injury place).
+
+    Pain data is insert-only, so each partition is brought up to date
+    incrementally: fetch_new(user_email, injury, since) must return the
+    partition's records created at or after `since` (all of them when None)
+    as dicts with _id, description and createdAt. It may return records that
+    were already indexed (e.g. an overlap window for clock skew between
+    writers); those are skipped.
+    Rows are embedded on demand by ensure_vectors(); embed(ids, texts) returns
+    their unit-length embeddings.
+    normalize/threshold are the duplicate checker's text normalization and
+    per-record similarity threshold.
+    At most max_users users are kept in memory (least recently used first out).
+    """
+
+    def __init__(
+        self,
+        fetch_new: Callable[[str, str, Optional[datetime]], Awaitable[List[dict]]],
+        embed: Callable[[List[str], List[str]], Awaitable[np.ndarray]],
+        normalize: Callable[[str], str],
+        threshold: Callable[[str], float],
+        max_users: int = 1024
+    ):
+        self.fetch_new = fetch_new
+        self.embed = embed
+        self.normalize = normalize
+        self.threshold = threshold
+        self.max_users = max_users
+        self._users: "OrderedDict[str, Dict[str, _Partition]]" = OrderedDict()
+
+    def _partition(self, user_email: str, injury: str) -> _Partition:
+        partitions = self._users.get(user_email)
+        if partitions is None:
+            partitions = self._users[user_email] = {}
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_email)
+        return partitions.setdefault(injury, _Partition())
+
+    def invalidate(self, user_email: Optional[str] = None) -> None:
+        if user_email is None:
+            self._users.clear()
+        else:
+            self._users.pop(user_email, None)
+
+    async def sync(self, user_email: str, injury: str) -> _Partition:
+        partition = self._partition(user_email, injury)
+        async with partition.lock:
+            records = [
+                r for r in await self.fetch_new(user_email, injury, partition.high_water)
+                if r["_id"] not in partition.seen
+            ]
+            if not records:
+                return partition
+
+            described = [r for r in records if r.get("description")]
+            texts = [self.normalize(r["description"]) for r in described]
+
+            for record in records:
+                created = record.get("createdAt")
+                text = self.normalize(record.get("description") or "")
+                current = partition.latest_by_text.get(text)
+                if current is None or (created is not None and (current[0] is None or created > current[0])):
+                    partition.latest_by_text[text] = (created, record["_id"])
+                if created is not None and (partition.high_water is None or created > partition.high_water):
+                    partition.high_water = created
+            if described:
+                partition.index.add(
+                    [r["_id"] for r in described], texts, [r.get("createdAt") for r in described],
+                    [self.threshold(t) for t in texts]
+                )
+            partition.seen.update(r["_id"] for r in records)
+            logger.debug(f"Indexed {len(records)} new records for {user_email} ({injury})")
+        return partition
+
+    async def ensure_vectors(self, partition: _Partition, positions: List[int]) -> int:
+        """Embeds the given rows of the partition's index that have no vector yet; returns how many."""
+        async with partition.lock:
+            index = partition.index
+            missing = index.missing(positions)
+            if missing:
+                vectors = await self.embed([str(index.ids[p]) for p in missing], [index.texts[p] for p in missing])
+                index.fill(missing, vectors)
+        return len(missing)
@@ -86,15 +86,19 @@ const createExercise = async (req, res, next) => {
       return next(new CustomError('PainData not found', 404));
     }
 
-    // 🧠 Call external AI recommender (Python backend)
-    const response = await axios.post(`${process.env.AI_URI}/ai/recommend`, painData, {
-      headers: {
-        'Authorization': 'Bearer ' + req.headers.authorization?.split(' ')[1],
-        'Content-Type': 'application/json'
-      }
-    });
+    // 🧠 Reuse the recommendation from /ai/intake, or call the AI recommender (Python backend)
+    let aiResult = req.aiRecommendation;
+    if (!aiResult) {
+      const response = await axios.post(`${process.env.AI_URI}/ai/recommend`, painData, {
+        headers: {
+          'Authorization': 'Bearer ' + req.headers.authorization?.split(' ')[1],
+          'Content-Type': 'application/json'
+        }
+      });
+      aiResult = response.data;
+    }
 
-    const { exercises, progress } = response.data;
+    const { exercises, progress } = aiResult;
 
     if (!Array.isArray(exercises) || exercises.length === 0) {
       return next(new CustomError('Exercises array is required', 400));
@@ -1,12 +1,15 @@
 const axios = require('axios');
 
-async function AI_PainDataValidator(req, res, next) {
+// Validates the pain data and checks duplicates in one /ai/intake call.
+// With { recommend: true } (routes that go on to createExercise) the same call
+// also recommends exercises; other routes skip the recommendation scoring.
+const makePainDataValidator = ({ recommend = false } = {}) => async function AI_PainDataValidator(req, res, next) {
   try {
     // -------------------------------
-    // 1️⃣ Validate injuryPlace & description
+    // 1️⃣ Validate description and check duplicates (and recommend) in one call
     // -------------------------------
-    const validateResponse = await axios.post(
-      `${process.env.AI_URI}/ai/validate`,
+    const intakeResponse = await axios.post(
+      `${process.env.AI_URI}/ai/intake/`,
       {
         userId: req.user._id,
         userEmail: req.user.email,
@@ -15,31 +18,25 @@ async function AI_PainDataValidator(req, res, next) {
         painLevel: req.body.painLevel,
         description: req.body.description,
       },
-      { headers: { 'Content-Type': 'application/json' } }
+      {
+        headers: { 'Content-Type': 'application/json' },
+        params: { recommend },
+      }
     );
 
-    if (!validateResponse.data.valid) {
+    if (!intakeResponse.data.valid) {
       return res.status(400).json({
         success: false,
-        message: validateResponse.data.message || 'Validation failed',
+        message: intakeResponse.data.detail || 'Validation failed',
       });
     }
 
     // -------------------------------
-    // 2️⃣ Check duplicates
+    // 2️⃣ Keep the recommendation so createExercise doesn't call the AI again
     // -------------------------------
-    await axios.post(
-      `${process.env.AI_URI}/ai/checkDuplicates`,
-      {
-        userId: req.user._id,
-        userEmail: req.user.email,
-        injuryPlace: req.body.injuryPlace,
-        painType: req.body.painType,
-        painLevel: req.body.painLevel,
-        description: req.body.description,
-      },
-      { headers: { 'Content-Type': 'application/json' } }
-    );
+    if (recommend) {
+      req.aiRecommendation = intakeResponse.data.recommendation;
+    }
 
     // If no exception, all good
     next();
@@ -65,6 +62,9 @@ async function AI_PainDataValidator(req, res, next) {
       message: error.message || 'Internal server error',
     });
   }
-}
+};
+
+const AI_PainDataValidator = makePainDataValidator();
+AI_PainDataValidator.withRecommendation = makePainDataValidator({ recommend: true });
 
 module.exports = AI_PainDataValidator;
@@ -18,6 +18,11 @@ const painDataSchema = new mongoose.Schema({
     required: true,
     trim: true
   },
+  // Same normalization as the AI duplicate check (normalize_text), so it can
+  // filter by injury place in the query
+  normalizedInjuryPlace: {
+    type: String
+  },
   painType: {
     type: String,
     required: true,
@@ -42,4 +47,22 @@ const painDataSchema = new mongoose.Schema({
   timestamps: true // Adds createdAt and updatedAt automatically
 });
 
+function normalizeInjuryPlace(injuryPlace) {
+  return (injuryPlace || '')
+    .toLowerCase()
+    .trim()
+    .replace(/[^a-zA-Z\s]/g, '')
+    .replace(/\s+/g, ' ');
+}
+
+painDataSchema.pre('save', function (next) {
+  if (this.isModified('injuryPlace') || this.normalizedInjuryPlace === undefined) {
+    this.normalizedInjuryPlace = normalizeInjuryPlace(this.injuryPlace);
+  }
+  next();
+});
+
+// Duplicate check: a user's records for one injury place, newest first
+painDataSchema.index({ userEmail: 1, normalizedInjuryPlace: 1, createdAt: -1 });
+
 module.exports = mongoose.model('PainData', painDataSchema);
@@ -16,7 +16,7 @@ router.get('/:userId', authorizeMiddleware, getByUserId);
 router.get('/', authorizeMiddleware, getByUserEmail);
 router.post('/userId', authorizeMiddleware, upload.single('doctorSlip'), AI_PainDataValidator, postByUserId);
 router.post('/', authorizeMiddleware, upload.single('doctorSlip'), AI_PainDataValidator, postByUserEmail);
-router.post('/exercise', authorizeMiddleware, upload.single('doctorSlip'), AI_PainDataValidator, postByUserEmailWithNext, createExercise);
+router.post('/exercise', authorizeMiddleware, upload.single('doctorSlip'), AI_PainDataValidator.withRecommendation, postByUserEmailWithNext, createExercise);
 
 
 module.exports = router;